@@ -3,26 +3,50 @@
 Network & Container Inventory Web Application
 Flask web server with auto-refresh and enhanced features
 """
-import logging
 import os
+
+
+# Running `python app.py` with the gevent backend needs the stdlib patched before
+# anything else imports it; under gunicorn the gevent worker has already done this
+if os.getenv("SOCKETIO_ASYNC_MODE") == "gevent":
+    from gevent import monkey
+
+    monkey.patch_all()
+
+import atexit
+import functools
+import gzip
+import hashlib
+import logging
+import queue
 import sys
 import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timedelta
 from logging.handlers import RotatingFileHandler
 
+import orjson
 import yaml
 from dotenv import load_dotenv
-from flask import Flask, jsonify, request, send_from_directory, send_file
+from flask import Flask, Response, abort, request
 from flask_swagger_ui import get_swaggerui_blueprint
 
-from config_validator import check_fatal_errors, validate_environment
+from batch_loader import BatchLoader
+from config_validator import check_fatal_errors, env_flag, validate_environment
 from database import Database
 from inventory_scanner import NetworkInventory
 from socketio_handler import (
+    ScanSummary,
     emit_scan_completed,
     emit_scan_failed,
+    emit_scan_progress,
     emit_scan_started,
+    emit_status_update,
+    flush_status_updates,
     init_socketio,
+    last_summary_payload,
 )
 
 
@@ -38,10 +62,12 @@ logging.basicConfig(
 )
 
 # Add file handler for persistent logs
-if not os.path.exists("logs"):
-    os.makedirs("logs")
+LOG_DIR = os.getenv("LOG_DIR", "logs")
+os.makedirs(LOG_DIR, exist_ok=True)
 
-file_handler = RotatingFileHandler("logs/app.log", maxBytes=10485760, backupCount=5)  # 10MB
+file_handler = RotatingFileHandler(
+    os.path.join(LOG_DIR, "app.log"), maxBytes=10485760, backupCount=5
+)  # 10MB
 file_handler.setFormatter(logging.Formatter("%(asctime)s [%(levelname)s] %(name)s: %(message)s"))
 logging.getLogger().addHandler(file_handler)
 
@@ -51,6 +77,8 @@ app = Flask(__name__, static_folder="frontend/dist", static_url_path="/")
 
 # Initialize WebSocket support
 socketio = init_socketio(app)
+# Don't drop a coalesced status update that is still waiting to go out
+atexit.register(flush_status_updates)
 
 # Swagger UI configuration
 SWAGGER_URL = "/api/docs"
@@ -61,38 +89,110 @@ swaggerui_blueprint = get_swaggerui_blueprint(
 app.register_blueprint(swaggerui_blueprint, url_prefix=SWAGGER_URL)
 
 # Initialize database
-db = Database()
+db = Database(os.getenv("DB_PATH", "data/inventory.db"))
+atexit.register(db.close)
+
+
+def _load_metric_batch(keys: list[tuple[str, int]]) -> dict:
+    """Fetch (metric_name, hours) keys with one query per distinct time range"""
+    names_by_hours = {}
+    for name, hours in keys:
+        names_by_hours.setdefault(hours, []).append(name)
+
+    results = {}
+    for hours, names in names_by_hours.items():
+        history = db.get_metric_history_batch(tuple(sorted(names)), hours=hours)
+        results.update(((name, hours), history[name]) for name in names)
+    return results
+
+
+# Dashboards request history rows and metric tiles in bursts; coalesce them into batched queries
+scan_loader = BatchLoader(db.get_scans_json_by_ids)
+metric_loader = BatchLoader(_load_metric_batch)
 
 # Configuration
 SCAN_COOLDOWN = int(os.getenv("SCAN_COOLDOWN", "300"))  # 5 minutes default
-HISTORY_ENABLED = os.getenv("HISTORY_ENABLED", "true").lower() == "true"
-last_scan_time = None
+HISTORY_ENABLED = env_flag("HISTORY_ENABLED", "true")
+last_scan_time = None  # Wall-clock time, for display and serialization
+last_scan_monotonic = None  # Monotonic time, for cooldown math
 last_scan_data = None
+# (scan data, its JSON minus the closing brace), rebuilt only when the scan changes
+scan_payload = None
 scan_lock = threading.Lock()
-is_scanning = False
+
+# Scans run one at a time; concurrent callers wait on the in-flight future
+scan_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="scan")
+current_scan_future: Future | None = None
+
+# Finished scans waiting to be written to history by the background writer
+history_queue = queue.Queue()
+history_writer = None
+history_writer_lock = threading.Lock()
+
+# Rendered diagrams keyed by (scan time, options hash, format)
+DIAGRAM_CACHE_SIZE = 32
+diagram_cache = OrderedDict()
+diagram_cache_lock = threading.Lock()
+
+# Pooled HTTP sessions keyed by remote target, kept alive across scans
+HTTP_SESSIONS = {}
+current_inventory = None
+
+
+# libyaml's C loader is much faster than the pure-Python one when available
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+@functools.lru_cache(maxsize=4)
+def _load_config_file(config_path: str, mtime_ns: int):
+    """Parse a YAML config file, cached until its modification time changes"""
+    logger.info(f"Loading configuration from {config_path}")
+    with open(config_path) as f:
+        config = yaml.load(f, Loader=YAML_LOADER)
+    if config:
+        logger.info("Configuration loaded successfully from YAML file")
+    return config
+
+
+# Environment variables read by the fallback config, snapshotted as its cache key
+CONFIG_ENV_VARS = (
+    "NETWORK_SCAN_ENABLED", "NETWORK_SUBNET",
+    "UNIFI_ENABLED", "UNIFI_HOST", "UNIFI_PORT", "UNIFI_USERNAME", "UNIFI_PASSWORD", "UNIFI_SITE",
+    "PORTAINER_NAME", "PORTAINER_ENABLED", "PORTAINER_URL", "PORTAINER_API_TOKEN",
+    "PROXMOX_NAME", "PROXMOX_ENABLED", "PROXMOX_HOST", "PROXMOX_API_TOKEN_NAME",
+    "PROXMOX_API_TOKEN_VALUE", "PROXMOX_VERIFY_SSL",
+)
 
 
 def load_config():
     """Load configuration from file or environment variables"""
     config_path = os.getenv("CONFIG_PATH", "config.yaml")
 
-    if os.path.exists(config_path):
-        logger.info(f"Loading configuration from {config_path}")
-        with open(config_path) as f:
-            config = yaml.safe_load(f)
-            if config:
-                logger.info("Configuration loaded successfully from YAML file")
-                return config
+    try:
+        mtime_ns = os.stat(config_path).st_mtime_ns
+    except OSError:
+        mtime_ns = None
+
+    if mtime_ns is not None:
+        config = _load_config_file(config_path, mtime_ns)
+        if config:
+            return config
 
     # Fallback to environment variables
+    return _load_config_env(tuple(os.environ.get(name) for name in CONFIG_ENV_VARS))
+
+
+@functools.lru_cache(maxsize=4)
+def _load_config_env(env_snapshot: tuple):
+    """Build the config from environment variables, cached until any of them change"""
     logger.info("Using environment variables for configuration")
     return {
         "network_scan": {
-            "enabled": os.getenv("NETWORK_SCAN_ENABLED", "true").lower() == "true",
+            "enabled": env_flag("NETWORK_SCAN_ENABLED", "true"),
             "subnet": os.getenv("NETWORK_SUBNET", "10.69.1.0/24"),
         },
         "unifi": {
-            "enabled": os.getenv("UNIFI_ENABLED", "true").lower() == "true",
+            "enabled": env_flag("UNIFI_ENABLED", "true"),
             "host": os.getenv("UNIFI_HOST"),
             "port": int(os.getenv("UNIFI_PORT", "443")),
             "username": os.getenv("UNIFI_USERNAME"),
@@ -102,7 +202,7 @@ def load_config():
         "portainer": [
             {
                 "name": os.getenv("PORTAINER_NAME", "Main Portainer"),
-                "enabled": os.getenv("PORTAINER_ENABLED", "true").lower() == "true",
+                "enabled": env_flag("PORTAINER_ENABLED", "true"),
                 "url": os.getenv("PORTAINER_URL"),
                 "api_token": os.getenv("PORTAINER_API_TOKEN"),
             }
@@ -110,57 +210,126 @@ def load_config():
         "proxmox": [
             {
                 "name": os.getenv("PROXMOX_NAME", "Main Proxmox"),
-                "enabled": os.getenv("PROXMOX_ENABLED", "false").lower() == "true",
+                "enabled": env_flag("PROXMOX_ENABLED", "false"),
                 "host": os.getenv("PROXMOX_HOST"),
                 "api_token_name": os.getenv("PROXMOX_API_TOKEN_NAME"),
                 "api_token_value": os.getenv("PROXMOX_API_TOKEN_VALUE"),
-                "verify_ssl": os.getenv("PROXMOX_VERIFY_SSL", "false").lower() == "true",
+                "verify_ssl": env_flag("PROXMOX_VERIFY_SSL", "false"),
             }
         ] if os.getenv("PROXMOX_HOST") else [],
     }
 
 
+def get_inventory(config: dict) -> NetworkInventory:
+    """Return the shared inventory, rebuilding it only when the config changes"""
+    global current_inventory
+    if current_inventory is None or current_inventory.config != config:
+        if current_inventory is not None:
+            current_inventory.close()
+        current_inventory = NetworkInventory(config, sessions=HTTP_SESSIONS)
+    return current_inventory
+
+
+def close_inventory():
+    """Log out of sessions the shared inventory keeps between scans"""
+    if current_inventory is not None:
+        current_inventory.close()
+
+
+atexit.register(close_inventory)
+
+
+def seconds_since_scan() -> float | None:
+    """Seconds elapsed since the last scan, immune to wall-clock jumps"""
+    if last_scan_monotonic is None:
+        return None
+    return time.monotonic() - last_scan_monotonic
+
+
 def can_scan():
     """Check if enough time has passed since last scan"""
-    global last_scan_time
-    if last_scan_time is None:
-        return True
+    elapsed = seconds_since_scan()
+    return elapsed is None or elapsed >= SCAN_COOLDOWN
+
+
+def _history_writer_loop():
+    """Persist finished scans to history off the request path"""
+    while True:
+        scan_data = history_queue.get()
+        try:
+            db.save_scan(scan_data)
+            logger.info("Scan data saved to history")
+        except Exception as e:
+            logger.error(f"Failed to save scan to history: {e}")
+        finally:
+            history_queue.task_done()
+
+
+def queue_history_save(scan_data: dict):
+    """Queue scan data for the history writer, starting it on first use"""
+    global history_writer
+    with history_writer_lock:
+        if history_writer is None:
+            history_writer = threading.Thread(
+                target=_history_writer_loop, name="history-writer", daemon=True
+            )
+            history_writer.start()
+            # Don't drop queued scans on shutdown
+            atexit.register(history_queue.join)
+    history_queue.put_nowait(scan_data)
 
-    time_since_scan = (datetime.now() - last_scan_time).total_seconds()
-    return time_since_scan >= SCAN_COOLDOWN
+
+def scan_in_progress() -> bool:
+    """Check if a scan is currently running"""
+    future = current_scan_future
+    return future is not None and not future.done()
 
 
 def perform_scan():
-    """Perform network and container inventory scan"""
-    global last_scan_time, last_scan_data, is_scanning
+    """Perform a scan, or wait for the one already in progress
+
+    Concurrent callers share a single in-flight scan and all receive its
+    result, instead of being rejected or triggering duplicate scans.
+    """
+    global current_scan_future
 
     with scan_lock:
-        if is_scanning:
-            logger.warning("Scan request rejected: scan already in progress")
-            return {"error": "Scan already in progress"}, 429
-
-        if not can_scan():
-            time_remaining = SCAN_COOLDOWN - (datetime.now() - last_scan_time).total_seconds()
-            logger.info(
-                f"Scan request rejected: cooldown active ({int(time_remaining)}s remaining)"
-            )
-            return {
-                "error": f"Please wait {int(time_remaining)} seconds before scanning again",
-                "cooldown_remaining": int(time_remaining),
-            }, 429
+        future = current_scan_future
+        if future is not None and not future.done():
+            logger.info("Scan already in progress, waiting for its result")
+        else:
+            if not can_scan():
+                time_remaining = SCAN_COOLDOWN - seconds_since_scan()
+                logger.info(
+                    f"Scan request rejected: cooldown active ({int(time_remaining)}s remaining)"
+                )
+                return {
+                    "error": f"Please wait {int(time_remaining)} seconds before scanning again",
+                    "cooldown_remaining": int(time_remaining),
+                }, 429
+
+            future = current_scan_future = scan_executor.submit(_run_scan)
+            # Push the post-scan status so clients don't need to poll for it
+            future.add_done_callback(lambda _: emit_status_update(build_status()))
 
-        is_scanning = True
+    return future.result()
+
+
+def _run_scan():
+    """Perform network and container inventory scan"""
+    global last_scan_time, last_scan_monotonic, last_scan_data
 
     try:
         logger.info("Starting network and container inventory scan")
         emit_scan_started()
 
         config = load_config()
-        inventory = NetworkInventory(config)
+        inventory = get_inventory(config)
 
-        network_data, container_data, vm_data = inventory.scan_all()
+        network_data, container_data, vm_data = inventory.scan_all(progress=emit_scan_progress)
 
         last_scan_time = datetime.now()
+        last_scan_monotonic = time.monotonic()
         last_scan_data = {
             "network": network_data,
             "containers": container_data,
@@ -169,20 +338,19 @@ def perform_scan():
             "next_scan_available": (last_scan_time + timedelta(seconds=SCAN_COOLDOWN)).isoformat(),
         }
 
-        # Save to history if enabled
+        # Serialize once now so /api/data polls don't have to
+        scan_json_prefix()
+
+        # Save to history if enabled (written in the background)
         if HISTORY_ENABLED:
-            try:
-                db.save_scan(last_scan_data)
-                logger.info("Scan data saved to history")
-            except Exception as e:
-                logger.error(f"Failed to save scan to history: {e}")
+            queue_history_save(last_scan_data)
 
         logger.info(
             f"Scan completed successfully: {len(network_data.get('clients', []))} UniFi clients, "
             f"{len(container_data)} containers"
         )
 
-        emit_scan_completed(last_scan_data)
+        emit_scan_completed(ScanSummary.from_scan(last_scan_data))
         return last_scan_data, 200
 
     except Exception as e:
@@ -190,33 +358,87 @@ def perform_scan():
         emit_scan_failed(str(e))
         return {"error": "Scan failed", "message": str(e)}, 500
 
-    finally:
-        with scan_lock:
-            is_scanning = False
+
+def json_response(data) -> Response:
+    """Serialize data with orjson, which is much faster than Flask's jsonify"""
+    return Response(orjson.dumps(data), mimetype="application/json")
+
+
+SWAGGER_PATH = os.path.join(os.path.dirname(__file__), "static", "swagger.json")
+
+
+@functools.lru_cache(maxsize=None)
+def read_static_file(path: str) -> tuple[bytes, str]:
+    """Read a static file once and keep its bytes and ETag in memory"""
+    with open(path, "rb") as f:
+        body = f.read()
+    return body, hashlib.md5(body, usedforsecurity=False).hexdigest()
+
+
+def cached_file_response(path: str, mimetype: str, max_age: int | None = None) -> Response:
+    """Serve an in-memory static file, answering 304 when the ETag matches"""
+    try:
+        body, etag = read_static_file(path)
+    except FileNotFoundError:
+        abort(404)
+
+    response = Response(body, mimetype=mimetype)
+    response.set_etag(etag)
+    if max_age is None:
+        response.cache_control.no_cache = True
+    else:
+        response.cache_control.public = True
+        response.cache_control.max_age = max_age
+    return response.make_conditional(request)
 
 
 @app.route("/swagger.json")
 def swagger_spec():
     """Serve OpenAPI/Swagger specification"""
-    import json
-
-    swagger_path = os.path.join(os.path.dirname(__file__), "static", "swagger.json")
-    with open(swagger_path) as f:
-        spec = json.load(f)
-    return jsonify(spec)
+    return cached_file_response(SWAGGER_PATH, "application/json", max_age=3600)
 
 
 @app.route("/")
 def index():
     """Serve the main dashboard (React app)"""
-    return send_from_directory(app.static_folder, "index.html")
+    # Always revalidate so a new frontend build is picked up
+    return cached_file_response(os.path.join(app.static_folder, "index.html"), "text/html")
 
 
 @app.route("/api/scan", methods=["POST"])
 def trigger_scan():
     """API endpoint to trigger a new scan"""
-    data, status_code = perform_scan()
-    return jsonify(data), status_code
+    return scan_result_response(*perform_scan())
+
+
+def scan_result_response(data: dict, status_code: int):
+    """Respond with a scan result, reusing the cached serialization for the current scan"""
+    if data is last_scan_data:
+        return Response(scan_json_prefix() + b"}", mimetype="application/json"), status_code
+    return json_response(data), status_code
+
+
+def scan_json_prefix() -> bytes:
+    """Serialized last scan without its closing brace, computed once per scan"""
+    global scan_payload
+    data = last_scan_data
+    payload = scan_payload
+    if payload is None or payload[0] is not data:
+        payload = scan_payload = (data, orjson.dumps(data)[:-1])
+    return payload[1]
+
+
+def scan_etag(can_refresh: bool) -> str:
+    """ETag for the current scan data, which also tracks the refresh state"""
+    return f"{last_scan_time.timestamp():.6f}-{int(can_refresh)}"
+
+
+def set_polling_cache_headers(response: Response, etag: str) -> Response:
+    """Attach the weak ETag and short private caching used by polled endpoints"""
+    response.set_etag(etag, weak=True)
+    response.cache_control.private = True
+    response.cache_control.max_age = 5
+    return response
 
 
 @app.route("/api/data", methods=["GET"])
@@ -224,86 +446,113 @@ def get_data():
     """Get the last scan data without triggering a new scan"""
     if last_scan_data is None:
         # If no data exists, perform initial scan
-        data, status_code = perform_scan()
-        return jsonify(data), status_code
+        return scan_result_response(*perform_scan())
 
-    # Return cached data with freshness info
-    response = last_scan_data.copy()
-    response["is_cached"] = True
-    response["can_refresh"] = can_scan()
+    # Pollers that already hold this scan get an empty 304
+    can_refresh = can_scan()
+    etag = scan_etag(can_refresh)
+    if request.if_none_match.contains_weak(etag):
+        return set_polling_cache_headers(Response(status=304), etag)
 
-    if last_scan_time:
-        response["age_seconds"] = (datetime.now() - last_scan_time).total_seconds()
+    # Return cached data with freshness info, spliced onto the pre-serialized scan
+    extras = {"is_cached": True, "can_refresh": can_refresh}
+    elapsed = seconds_since_scan()
+    if elapsed is not None:
+        extras["age_seconds"] = elapsed
 
-    return jsonify(response)
+    body = scan_json_prefix() + b"," + orjson.dumps(extras)[1:]
+    response = Response(body, mimetype="application/json")
+    return set_polling_cache_headers(response, etag)
 
 
-@app.route("/api/status", methods=["GET"])
-def get_status():
-    """Get scan status information"""
+def build_status() -> dict:
+    """Build the scan status payload shared by /api/status and status_update events"""
     status = {
-        "is_scanning": is_scanning,
+        "is_scanning": scan_in_progress(),
         "can_scan": can_scan(),
         "last_scan": last_scan_time.isoformat() if last_scan_time else None,
         "scan_cooldown": SCAN_COOLDOWN,
     }
 
-    if last_scan_time and not can_scan():
-        time_remaining = SCAN_COOLDOWN - (datetime.now() - last_scan_time).total_seconds()
-        status["cooldown_remaining"] = int(time_remaining)
+    elapsed = seconds_since_scan()
+    if elapsed is not None and elapsed < SCAN_COOLDOWN:
+        status["cooldown_remaining"] = int(SCAN_COOLDOWN - elapsed)
+
+    return status
+
+
+@app.route("/api/status", methods=["GET"])
+def get_status():
+    """Get scan status information
+
+    Connected clients also receive this as a status_update socket event after
+    each scan; polling is the fallback when the socket is unavailable.
+    """
+    response = json_response(build_status())
+    response.add_etag()
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
 
-    return jsonify(status)
+@app.route("/api/last-summary", methods=["GET"])
+def get_last_summary():
+    """Get the summary broadcast with the last scan_completed event"""
+    payload = last_summary_payload()
+    if payload is None:
+        return json_response({"error": "No scan has completed yet"}), 404
+    return Response(payload, mimetype="application/json")
 
 
 @app.route("/health")
 def health():
     """Health check endpoint"""
-    return jsonify({"status": "healthy"}), 200
+    return json_response({"status": "healthy"}), 200
 
 
 @app.route("/api/history", methods=["GET"])
 def get_history():
     """Get scan history"""
     if not HISTORY_ENABLED:
-        return jsonify({"error": "History feature is disabled"}), 404
+        return json_response({"error": "History feature is disabled"}), 404
 
     limit = request.args.get("limit", 10, type=int)
     scans = db.get_recent_scans(limit=min(limit, 100))
-    return jsonify({"scans": scans})
+    return json_response({"scans": scans})
 
 
 @app.route("/api/history/<int:scan_id>", methods=["GET"])
 def get_history_scan(scan_id):
     """Get specific historical scan by ID"""
     if not HISTORY_ENABLED:
-        return jsonify({"error": "History feature is disabled"}), 404
+        return json_response({"error": "History feature is disabled"}), 404
 
-    scan = db.get_scan_by_id(scan_id)
-    if scan:
-        return jsonify(scan)
-    return jsonify({"error": "Scan not found"}), 404
+    scan_json = scan_loader.load(scan_id).result()
+    if scan_json:
+        return Response(scan_json, mimetype="application/json")
+    return json_response({"error": "Scan not found"}), 404
 
 
 @app.route("/api/metrics/<metric_name>", methods=["GET"])
 def get_metrics(metric_name):
     """Get metric history for trend analysis"""
     if not HISTORY_ENABLED:
-        return jsonify({"error": "History feature is disabled"}), 404
+        return json_response({"error": "History feature is disabled"}), 404
 
     hours = request.args.get("hours", 24, type=int)
-    metrics = db.get_metric_history(metric_name, hours=min(hours, 168))  # Max 1 week
-    return jsonify({"metric": metric_name, "data": metrics})
+    metrics = metric_loader.load((metric_name, min(hours, 168))).result()  # Max 1 week
+    return json_response({"metric": metric_name, "data": metrics})
 
 
 @app.route("/api/history/cleanup", methods=["POST"])
 def cleanup_history():
     """Cleanup old historical data"""
     if not HISTORY_ENABLED:
-        return jsonify({"error": "History feature is disabled"}), 404
+        return json_response({"error": "History feature is disabled"}), 404
 
     days = request.args.get("days", 30, type=int)
     result = db.cleanup_old_data(days=days)
-    return jsonify(result)
+    return json_response(result)
 
 
 @app.route("/api/settings", methods=["GET"])
@@ -311,10 +560,10 @@ def get_settings():
     """Get all user settings"""
     try:
         settings = db.get_all_settings()
-        return jsonify({"settings": settings})
+        return json_response({"settings": settings})
     except Exception as e:
         logger.error(f"Failed to get settings: {e}")
-        return jsonify({"error": "Failed to retrieve settings"}), 500
+        return json_response({"error": "Failed to retrieve settings"}), 500
 
 
 @app.route("/api/settings", methods=["PUT"])
@@ -323,15 +572,58 @@ def update_settings():
     try:
         data = request.get_json()
         if not data or "settings" not in data:
-            return jsonify({"error": "Invalid request body"}), 400
+            return json_response({"error": "Invalid request body"}), 400
 
         settings = data["settings"]
         db.update_settings(settings)
         logger.info(f"Settings updated: {list(settings.keys())}")
-        return jsonify({"success": True, "settings": settings})
+        return json_response({"success": True, "settings": settings})
     except Exception as e:
         logger.error(f"Failed to update settings: {e}")
-        return jsonify({"error": "Failed to update settings"}), 500
+        return json_response({"error": "Failed to update settings"}), 500
+
+
+def render_diagram(options: dict, format: str) -> bytes:
+    """Render a diagram of the latest scan, reusing output for identical requests"""
+    from diagram_generator import TopologyDiagramGenerator
+
+    scan_data, scan_time = last_scan_data, last_scan_time
+    use_cache = not options.get("nocache")
+    options_hash = hashlib.blake2b(
+        orjson.dumps(options, option=orjson.OPT_SORT_KEYS), digest_size=16
+    ).digest()
+    key = (scan_time, options_hash, format)
+
+    if use_cache:
+        with diagram_cache_lock:
+            cached = diagram_cache.get(key)
+            if cached is not None:
+                diagram_cache.move_to_end(key)
+                return cached
+
+    diagram_bytes = TopologyDiagramGenerator(scan_data, options).generate(format=format, use_cache=use_cache)
+
+    if use_cache:
+        with diagram_cache_lock:
+            diagram_cache[key] = diagram_bytes
+            if len(diagram_cache) > DIAGRAM_CACHE_SIZE:
+                diagram_cache.popitem(last=False)
+    return diagram_bytes
+
+
+def diagram_response(diagram_bytes: bytes, mimetype: str, filename: str | None = None) -> Response:
+    """Wrap diagram bytes in a response, gzipping SVG when the client accepts it"""
+    response = Response(diagram_bytes, mimetype=mimetype)
+    if filename:
+        response.headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+
+    # SVG is text and typically compresses 5-10x; PNG is already compressed
+    if mimetype == "image/svg+xml":
+        response.vary.add("Accept-Encoding")
+        if "gzip" in request.accept_encodings:
+            response.set_data(gzip.compress(diagram_bytes, compresslevel=6))
+            response.headers["Content-Encoding"] = "gzip"
+    return response
 
 
 @app.route("/api/diagram/generate", methods=["POST"])
@@ -340,39 +632,30 @@ def generate_diagram():
     try:
         data = request.get_json()
         if not data:
-            return jsonify({"error": "Invalid request body"}), 400
+            return json_response({"error": "Invalid request body"}), 400
 
         format = data.get("format", "png")  # png or svg
         options = data.get("options", {})
 
         if format not in ['png', 'svg']:
-            return jsonify({"error": "Invalid format. Use 'png' or 'svg'"}), 400
+            return json_response({"error": "Invalid format. Use 'png' or 'svg'"}), 400
 
         # Get latest scan data or use cached
         if last_scan_data is None:
-            return jsonify({"error": "No scan data available. Please run a scan first."}), 404
+            return json_response({"error": "No scan data available. Please run a scan first."}), 404
 
         # Generate diagram
-        from diagram_generator import TopologyDiagramGenerator
-        import io
-
-        generator = TopologyDiagramGenerator(last_scan_data, options)
-        diagram_bytes = generator.generate(format=format)
+        diagram_bytes = render_diagram(options, format)
 
         # Return as downloadable file
         mimetype = 'image/png' if format == 'png' else 'image/svg+xml'
         filename = f'network-topology.{format}'
 
-        return send_file(
-            io.BytesIO(diagram_bytes),
-            mimetype=mimetype,
-            as_attachment=True,
-            download_name=filename
-        )
+        return diagram_response(diagram_bytes, mimetype, filename=filename)
 
     except Exception as e:
         logger.error(f"Diagram generation failed: {e}", exc_info=True)
-        return jsonify({"error": str(e)}), 500
+        return json_response({"error": str(e)}), 500
 
 
 @app.route("/api/diagram/preview", methods=["POST"])
@@ -381,34 +664,23 @@ def preview_diagram():
     try:
         data = request.get_json()
         if not data:
-            return jsonify({"error": "Invalid request body"}), 400
+            return json_response({"error": "Invalid request body"}), 400
 
         options = data.get("options", {})
 
         # Get latest scan data or use cached
         if last_scan_data is None:
-            return jsonify({"error": "No scan data available. Please run a scan first."}), 404
+            return json_response({"error": "No scan data available. Please run a scan first."}), 404
 
         # Generate diagram as SVG
-        from diagram_generator import TopologyDiagramGenerator
-        import io
-
-        generator = TopologyDiagramGenerator(last_scan_data, options)
-        diagram_bytes = generator.generate(format='svg')
+        diagram_bytes = render_diagram(options, 'svg')
 
-        # Get grouping info
-        grouping_info = generator.get_grouping_info()
-
-        # Return SVG inline with grouping metadata
-        return send_file(
-            io.BytesIO(diagram_bytes),
-            mimetype='image/svg+xml',
-            as_attachment=False  # Display inline
-        )
+        # Return SVG inline
+        return diagram_response(diagram_bytes, 'image/svg+xml')
 
     except Exception as e:
         logger.error(f"Diagram preview failed: {e}", exc_info=True)
-        return jsonify({"error": str(e)}), 500
+        return json_response({"error": str(e)}), 500
 
 
 @app.route("/api/diagram/templates", methods=["GET"])
@@ -416,10 +688,10 @@ def get_diagram_templates():
     """Get all diagram templates"""
     try:
         templates = db.get_diagram_templates()
-        return jsonify({"templates": templates})
+        return json_response({"templates": templates})
     except Exception as e:
         logger.error(f"Failed to fetch diagram templates: {e}")
-        return jsonify({"error": "Failed to fetch templates"}), 500
+        return json_response({"error": "Failed to fetch templates"}), 500
 
 
 @app.route("/api/diagram/templates", methods=["POST"])
@@ -428,7 +700,7 @@ def save_diagram_template():
     try:
         data = request.get_json()
         if not data or "name" not in data or "options" not in data:
-            return jsonify({"error": "Invalid request body. Required: name, options"}), 400
+            return json_response({"error": "Invalid request body. Required: name, options"}), 400
 
         name = data["name"]
         options = data["options"]
@@ -436,14 +708,14 @@ def save_diagram_template():
         template_id = db.save_diagram_template(name, options)
         logger.info(f"Saved diagram template: {name}")
 
-        return jsonify({
+        return json_response({
             "success": True,
             "id": template_id,
             "name": name
         })
     except Exception as e:
         logger.error(f"Failed to save diagram template: {e}")
-        return jsonify({"error": "Failed to save template"}), 500
+        return json_response({"error": "Failed to save template"}), 500
 
 
 @app.route("/api/diagram/templates/<name>", methods=["DELETE"])
@@ -452,16 +724,16 @@ def delete_diagram_template(name):
     try:
         deleted = db.delete_diagram_template(name)
         if deleted:
-            return jsonify({"success": True})
+            return json_response({"success": True})
         else:
-            return jsonify({"error": "Template not found"}), 404
+            return json_response({"error": "Template not found"}), 404
     except Exception as e:
         logger.error(f"Failed to delete diagram template: {e}")
-        return jsonify({"error": "Failed to delete template"}), 500
+        return json_response({"error": "Failed to delete template"}), 500
 
 
-if __name__ == "__main__":
-    # Validate environment before starting
+def validate_startup():
+    """Print environment validation results and exit on fatal errors"""
     logger.info("Validating configuration...")
     warnings = validate_environment()
 
@@ -480,9 +752,14 @@ if __name__ == "__main__":
         logger.error("Fatal configuration errors detected. Exiting.")
         sys.exit(1)
 
+
+if __name__ == "__main__":
+    # Validate environment before starting
+    validate_startup()
+
     # Run Flask app
     port = int(os.getenv("PORT", "5000"))
-    debug = os.getenv("DEBUG", "false").lower() == "true"
+    debug = env_flag("DEBUG")
 
     logger.info("=" * 70)
     logger.info("  Network Inventory Dashboard Starting")
@@ -491,7 +768,7 @@ if __name__ == "__main__":
     logger.info(f"  Log Level: {LOG_LEVEL}")
     logger.info(f"  Scan Cooldown: {SCAN_COOLDOWN} seconds")
     logger.info(f"  History Tracking: {'Enabled' if HISTORY_ENABLED else 'Disabled'}")
-    logger.info("  WebSocket: Enabled")
+    logger.info(f"  WebSocket: Enabled ({socketio.async_mode})")
     logger.info(f"  Debug Mode: {debug}")
     logger.info(f"  API Docs: http://localhost:{port}/api/docs")
     logger.info("=" * 70)
@@ -0,0 +1,59 @@
+"""Request coalescing for bursty per-item lookups"""
+
+import logging
+import threading
+from concurrent.futures import Future
+
+
+logger = logging.getLogger(__name__)
+
+
+class BatchLoader:
+    """
+    Coalesce single-key loads arriving within a short window into one batch call
+
+    Each load() returns a Future. The first load after an idle period starts a
+    timer; when it fires, every key requested in the meantime is handed to
+    batch_fn in a single call.
+    """
+
+    def __init__(self, batch_fn, window: float = 0.005):
+        """
+        Args:
+            batch_fn: Callable taking a list of keys and returning a dict of key -> value
+            window: Seconds to wait for more keys before dispatching a batch
+        """
+        self.batch_fn = batch_fn
+        self.window = window
+        self._pending: dict = {}
+        self._timer: threading.Timer | None = None
+        self._lock = threading.Lock()
+
+    def load(self, key) -> Future:
+        """Queue a key for the next batch; missing keys resolve to None"""
+        with self._lock:
+            future = self._pending.get(key)
+            if future is None:
+                future = self._pending[key] = Future()
+                if self._timer is None:
+                    self._timer = threading.Timer(self.window, self._dispatch)
+                    self._timer.daemon = True
+                    self._timer.start()
+            return future
+
+    def _dispatch(self):
+        """Run batch_fn for everything queued and resolve the waiting futures"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._timer = None
+
+        try:
+            results = self.batch_fn(list(pending))
+        except Exception as e:
+            logger.error(f"Batch load of {len(pending)} keys failed: {e}")
+            for future in pending.values():
+                future.set_exception(e)
+            return
+
+        for key, future in pending.items():
+            future.set_result(results.get(key))
@@ -1,20 +1,51 @@
 """Configuration validation module"""
 
+import functools
 import logging
 import os
 import sys
 
-from pydantic import BaseModel, Field, ValidationError, field_validator
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError, field_validator
+
+try:
+    import re2 as re  # linear-time matcher, no backtracking
+except ImportError:
+    import re
 
 
 logger = logging.getLogger(__name__)
 
+_TRUTHY = frozenset(("true", "1", "yes"))
+
+
+def env_flag(key: str, default: str = "false") -> bool:
+    """Read a boolean flag from the environment"""
+    return os.environ.get(key, default).lower() in _TRUTHY
+
+
+_SUBNET_RE = re.compile(r"(\d{1,3})\.(\d{1,3})\.(\d{1,3})\.(\d{1,3})/(\d{1,2})")
+_URL_RE = re.compile(r"https?://")
+
+_FATAL_PREFIX = "ERROR:"
+_FATAL_PREFIX_LEN = len(_FATAL_PREFIX)
+
 
 class NetworkScanConfig(BaseModel):
     """Network scan configuration"""
 
     enabled: bool = True
-    subnet: str = Field(..., pattern=r"^\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}/\d{1,2}$")
+    subnet: str
+
+    @field_validator("subnet")
+    @classmethod
+    def validate_subnet(cls, v: str) -> str:
+        match = _SUBNET_RE.fullmatch(v)
+        if not match:
+            raise ValueError("Subnet must be in CIDR notation, e.g. 192.168.1.0/24")
+        *octets, mask = (int(part) for part in match.groups())
+        if any(octet > 255 for octet in octets) or mask > 32:
+            raise ValueError(f"Subnet {v} is not a valid IPv4 CIDR range")
+        return v
 
 
 class UniFiConfig(BaseModel):
@@ -46,7 +77,7 @@ class PortainerInstanceConfig(BaseModel):
     @field_validator("url")
     @classmethod
     def validate_url(cls, v: str) -> str:
-        if not v.startswith(("http://", "https://")):
+        if not _URL_RE.match(v):
             raise ValueError("Portainer URL must start with http:// or https://")
         return v
 
@@ -59,6 +90,10 @@ class AppConfig(BaseModel):
     portainer: list[PortainerInstanceConfig] | None = None
 
 
+# Built once at import so validation goes straight to the compiled pydantic-core schema
+APP_CONFIG_ADAPTER = TypeAdapter(AppConfig)
+
+
 def validate_config(config: dict) -> AppConfig:
     """
     Validate configuration dictionary against schema
@@ -73,27 +108,44 @@ def validate_config(config: dict) -> AppConfig:
         ValidationError: If configuration is invalid
     """
     try:
-        return AppConfig(**config)
+        return APP_CONFIG_ADAPTER.validate_python(config)
     except ValidationError as e:
         logger.error(f"Configuration validation failed: {e}")
         raise
 
 
-def validate_environment() -> list[str]:
+# Environment variables read by validate_environment, snapshotted as its cache key
+VALIDATED_ENV_VARS = (
+    "NETWORK_SCAN_ENABLED", "NETWORK_SUBNET",
+    "UNIFI_ENABLED", "UNIFI_HOST", "UNIFI_USERNAME", "UNIFI_PASSWORD",
+    "PORTAINER_ENABLED", "PORTAINER_URL", "PORTAINER_API_TOKEN",
+)
+
+
+def validate_environment() -> tuple[str, ...]:
     """
     Validate required environment variables are set
 
+    The result is cached until any of the variables it reads change.
+
     Returns:
-        List of validation warnings (not fatal errors)
+        Tuple of validation warnings (not fatal errors)
     """
+    return _validate_environment(tuple(os.environ.get(name) for name in VALIDATED_ENV_VARS))
+
+
+@functools.lru_cache(maxsize=4)
+def _validate_environment(env_snapshot: tuple) -> tuple[str, ...]:
+    """Validate the environment, cached per snapshot of VALIDATED_ENV_VARS"""
     warnings = []
 
-    # Check if at least one data source is enabled
-    network_enabled = os.getenv("NETWORK_SCAN_ENABLED", "true").lower() == "true"
-    unifi_enabled = os.getenv("UNIFI_ENABLED", "true").lower() == "true"
-    portainer_enabled = os.getenv("PORTAINER_ENABLED", "true").lower() == "true"
+    # Read when called, not at import, so flags loaded from .env are honored
+    network_scan_enabled = env_flag("NETWORK_SCAN_ENABLED", "true")
+    unifi_enabled = env_flag("UNIFI_ENABLED", "true")
+    portainer_enabled = env_flag("PORTAINER_ENABLED", "true")
 
-    if not any([network_enabled, unifi_enabled, portainer_enabled]):
+    # Check if at least one data source is enabled
+    if not (network_scan_enabled or unifi_enabled or portainer_enabled):
         warnings.append("WARNING: All data sources are disabled. Enable at least one.")
 
     # Check UniFi credentials if enabled
@@ -113,15 +165,15 @@ def validate_environment() -> list[str]:
             warnings.append("ERROR: PORTAINER_API_TOKEN is required when Portainer is enabled")
 
     # Check network subnet if network scan enabled
-    if network_enabled:
+    if network_scan_enabled:
         subnet = os.getenv("NETWORK_SUBNET")
         if not subnet:
             warnings.append("WARNING: NETWORK_SUBNET not set, using default: 10.69.1.0/24")
 
-    return warnings
+    return tuple(warnings)
 
 
-def check_fatal_errors(warnings: list[str]) -> bool:
+def check_fatal_errors(warnings: list[str] | tuple[str, ...]) -> bool:
     """
     Check if any warnings are fatal errors
 
@@ -131,7 +183,7 @@ def check_fatal_errors(warnings: list[str]) -> bool:
     Returns:
         True if fatal errors exist
     """
-    return any(w.startswith("ERROR:") for w in warnings)
+    return any(w[:_FATAL_PREFIX_LEN] == _FATAL_PREFIX for w in warnings)
 
 
 if __name__ == "__main__":
@@ -1,27 +1,207 @@
 """Database module for historical data tracking"""
 
-import json
+import functools
 import logging
+import os
+import queue
 import sqlite3
+import threading
+import time
+import zlib
 from contextlib import contextmanager
-from datetime import datetime
+from datetime import datetime, timedelta
+
+import orjson
+
+
+try:
+    import zstandard
+except ImportError:  # zlib fallback below keeps history working without the optional codec
+    zstandard = None
 
 
 logger = logging.getLogger(__name__)
 
+# Memoized reads are reused until the next write or until they are this old (seconds)
+READ_CACHE_TTL = 30
+READ_CACHE_MAXSIZE = 256
+
+# Per-connection tuning; journal_mode=WAL is persistent and set once in _init_db
+CONNECTION_PRAGMAS = """
+    PRAGMA synchronous=NORMAL;
+    PRAGMA temp_store=MEMORY;
+    PRAGMA cache_size=-65536;
+    PRAGMA mmap_size=268435456;
+    PRAGMA busy_timeout=5000;
+"""
+
+# Scan summary fields stored as their own scan_history columns so listings skip JSON decoding
+SUMMARY_COLUMNS = ("total_clients", "total_containers", "total_networks", "total_aps")
+
+# Stored in PRAGMA user_version; bump when the schema, migrations or default settings change
+SCHEMA_VERSION = 1
+
+# Metric history requests longer than this read hourly averages from metrics_hourly
+ROLLUP_MIN_HOURS = 48
+HOUR_US = 3_600_000_000
+
+# One-byte codec prefix on compressed scan_history.data blobs; legacy rows are plain JSON text
+CODEC_ZLIB = b"\x01"
+CODEC_ZSTD = b"\x02"
+ZSTD_LEVEL = 3
+ZLIB_LEVEL = 6
+
+# Seeded into the settings table on startup when missing
+DEFAULT_SETTINGS = (
+    ("auto_refresh_enabled", "false"),
+    ("status_poll_interval", "5000"),
+    ("default_chart_time_range", "24"),
+    ("theme", "light"),
+    ("scan_cooldown", "300"),
+    ("diagram_include_containers", "true"),
+    ("diagram_include_vms", "true"),
+    ("diagram_include_iot_devices", "true"),
+    ("diagram_include_vlans", "true"),
+    ("diagram_include_aps", "true"),
+    ("diagram_theme", "light"),
+    ("diagram_last_template", ""),
+)
+
+# Update settings in place, leaving rows with an unchanged value untouched
+UPSERT_SETTING_SQL = """
+    INSERT INTO settings (key, value, updated_at)
+    VALUES (?, ?, datetime('now'))
+    ON CONFLICT(key) DO UPDATE SET
+        value = excluded.value,
+        updated_at = excluded.updated_at
+    WHERE settings.value IS NOT excluded.value
+"""
+
+# Background metric writes are committed in batches of up to this many rows, or after this long (seconds)
+METRICS_BATCH_SIZE = 500
+METRICS_BATCH_WINDOW = 0.05
+
+# Idle connections kept open for reuse; extra ones opened under load are closed on release
+CONNECTION_POOL_SIZE = 4
+
+
+def to_epoch_us(value: datetime | str) -> int:
+    """Convert a datetime or ISO string (naive values are local time) to integer unix microseconds"""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return int(value.replace(microsecond=0).timestamp()) * 1_000_000 + value.microsecond
+
+
+def from_epoch_us(value: int) -> str:
+    """Convert stored unix microseconds back to the local ISO string used by the API"""
+    seconds, micros = divmod(value, 1_000_000)
+    return datetime.fromtimestamp(seconds).replace(microsecond=micros).isoformat()
+
+
+def pack_scan_data(scan_data: dict) -> bytes:
+    """Serialize and compress scan data for storage, preferring zstd when available"""
+    raw = orjson.dumps(scan_data)
+    if zstandard is not None:
+        return CODEC_ZSTD + zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(raw)
+    return CODEC_ZLIB + zlib.compress(raw, ZLIB_LEVEL)
+
+
+def unpack_scan_json(value: bytes | str) -> bytes:
+    """Return the JSON bytes of a stored scan_history.data value written by any version"""
+    if isinstance(value, str):
+        return value.encode()
+
+    codec, payload = value[:1], value[1:]
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("Scan data is zstd-compressed but the zstandard package is not installed")
+        return zstandard.ZstdDecompressor().decompress(payload)
+    if codec == CODEC_ZLIB:
+        return zlib.decompress(payload)
+    return value
+
+
+def unpack_scan_data(value: bytes | str) -> dict:
+    """Decode a stored scan_history.data value written by any version"""
+    return orjson.loads(unpack_scan_json(value))
+
+
+def cutoff_timestamp(**delta) -> int:
+    """Stored timestamp value for `delta` ago"""
+    return to_epoch_us(datetime.now() - timedelta(**delta))
+
+
+def memoized_read(method):
+    """Cache a read method's result until the next write or READ_CACHE_TTL expires"""
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        key = (method.__name__, args, tuple(sorted(kwargs.items())))
+        now = time.monotonic()
+        with self._cache_lock:
+            entry = self._read_cache.get(key)
+            if entry is not None and now - entry[0] < READ_CACHE_TTL:
+                return entry[1]
+            version = self._cache_version
+
+        result = method(self, *args, **kwargs)
+
+        with self._cache_lock:
+            # Don't store a result that a concurrent write has already made stale
+            if version == self._cache_version:
+                if len(self._read_cache) >= READ_CACHE_MAXSIZE:
+                    self._read_cache.clear()
+                self._read_cache[key] = (now, result)
+        return result
+
+    return wrapper
+
+
+def invalidates_reads(method):
+    """Drop memoized reads once a write method has run"""
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            with self._cache_lock:
+                self._cache_version += 1
+                self._read_cache.clear()
+
+    return wrapper
+
 
 class Database:
     """SQLite database manager for scan history"""
 
     def __init__(self, db_path: str = "data/inventory.db"):
         self.db_path = db_path
+        self._read_cache = {}
+        self._cache_version = 0
+        self._cache_lock = threading.Lock()
+        self._pool: list[sqlite3.Connection] = []
+        self._pool_lock = threading.Lock()
+        self._metrics_queue: queue.Queue = queue.Queue()
+        self._metrics_writer: threading.Thread | None = None
+        self._metrics_writer_lock = threading.Lock()
         self._init_db()
 
+    def _open(self) -> sqlite3.Connection:
+        """Open a tuned connection that may be handed between threads"""
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.executescript(CONNECTION_PRAGMAS)
+        return conn
+
     @contextmanager
     def get_connection(self):
-        """Context manager for database connections"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
+        """Context manager for pooled database connections"""
+        with self._pool_lock:
+            conn = self._pool.pop() if self._pool else None
+        if conn is None:
+            conn = self._open()
+
         try:
             yield conn
             conn.commit()
@@ -30,15 +210,34 @@ class Database:
             logger.error(f"Database error: {e}", exc_info=True)
             raise
         finally:
+            with self._pool_lock:
+                if len(self._pool) < CONNECTION_POOL_SIZE:
+                    self._pool.append(conn)
+                    conn = None
+            if conn is not None:
+                conn.close()
+
+    def close(self):
+        """Flush pending metric writes and close all idle pooled connections"""
+        self.flush()
+        with self._pool_lock:
+            pool, self._pool = self._pool, []
+        for conn in pool:
             conn.close()
 
     def _init_db(self):
-        """Initialize database schema"""
-        import os
-
-        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        """Initialize database schema, skipping all work when it is already current"""
+        db_dir = os.path.dirname(self.db_path)
+        if db_dir and not os.path.isdir(db_dir):
+            os.makedirs(db_dir, exist_ok=True)
 
         with self.get_connection() as conn:
+            if conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION:
+                return
+
+            # WAL lets readers run alongside save_scan writes and avoids the rollback journal's extra fsync
+            conn.execute("PRAGMA journal_mode=WAL")
+
             cursor = conn.cursor()
 
             # Scan history table
@@ -46,21 +245,23 @@ class Database:
                 """
                 CREATE TABLE IF NOT EXISTS scan_history (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    timestamp DATETIME NOT NULL,
+                    timestamp INTEGER NOT NULL,  -- unix microseconds
                     scan_type TEXT NOT NULL,
-                    data TEXT NOT NULL,
+                    data BLOB NOT NULL,
                     summary TEXT,
                     created_at DATETIME DEFAULT CURRENT_TIMESTAMP
                 )
             """
             )
 
+            self._add_summary_columns(cursor)
+
             # Metrics table for aggregated stats
             cursor.execute(
                 """
                 CREATE TABLE IF NOT EXISTS metrics (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    timestamp DATETIME NOT NULL,
+                    timestamp INTEGER NOT NULL,  -- unix microseconds
                     metric_name TEXT NOT NULL,
                     metric_value REAL NOT NULL,
                     metadata TEXT,
@@ -69,6 +270,9 @@ class Database:
             """
             )
 
+            self._convert_text_timestamps(cursor)
+            self._create_metrics_rollup(cursor)
+
             # Create indexes
             cursor.execute(
                 """
@@ -84,6 +288,14 @@ class Database:
             """
             )
 
+            # Covers metric history lookups so they never touch the table rows
+            cursor.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_metrics_name_timestamp
+                ON metrics(metric_name, timestamp, metric_value, metadata)
+            """
+            )
+
             # User settings table
             cursor.execute(
                 """
@@ -108,27 +320,72 @@ class Database:
             """
             )
 
-            # Insert default settings if they don't exist
-            cursor.execute(
-                """
-                INSERT OR IGNORE INTO settings (key, value) VALUES
-                ('auto_refresh_enabled', 'false'),
-                ('status_poll_interval', '5000'),
-                ('default_chart_time_range', '24'),
-                ('theme', 'light'),
-                ('scan_cooldown', '300'),
-                ('diagram_include_containers', 'true'),
-                ('diagram_include_vms', 'true'),
-                ('diagram_include_iot_devices', 'true'),
-                ('diagram_include_vlans', 'true'),
-                ('diagram_include_aps', 'true'),
-                ('diagram_theme', 'light'),
-                ('diagram_last_template', '')
-            """
-            )
+            # Insert default settings that don't exist yet
+            existing = {row["key"] for row in cursor.execute("SELECT key FROM settings")}
+            missing = [(key, value) for key, value in DEFAULT_SETTINGS if key not in existing]
+            if missing:
+                cursor.executemany("INSERT INTO settings (key, value) VALUES (?, ?)", missing)
 
+            cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
             logger.info(f"Database initialized at {self.db_path}")
 
+    def _add_summary_columns(self, cursor):
+        """Add the summary count columns to older databases and backfill them"""
+        existing = {row["name"] for row in cursor.execute("PRAGMA table_info(scan_history)")}
+        missing = [column for column in SUMMARY_COLUMNS if column not in existing]
+        if not missing:
+            return
+
+        for column in missing:
+            cursor.execute(f"ALTER TABLE scan_history ADD COLUMN {column} INTEGER")
+
+        assignments = ", ".join(f"{column} = json_extract(summary, '$.{column}')" for column in missing)
+        cursor.execute(f"UPDATE scan_history SET {assignments} WHERE summary IS NOT NULL")
+        logger.info(f"Added scan summary columns: {', '.join(missing)}")
+
+    def _convert_text_timestamps(self, cursor):
+        """Rewrite ISO string timestamps from older databases as unix microseconds"""
+        for table in ("scan_history", "metrics"):
+            rows = cursor.execute(f"SELECT id, timestamp FROM {table} WHERE typeof(timestamp) = 'text'").fetchall()
+            if rows:
+                cursor.executemany(
+                    f"UPDATE {table} SET timestamp = ? WHERE id = ?",
+                    [(to_epoch_us(row["timestamp"]), row["id"]) for row in rows],
+                )
+                logger.info(f"Converted {len(rows)} {table} timestamps to unix microseconds")
+
+    def _create_metrics_rollup(self, cursor):
+        """Create the hourly metrics rollup, backfilling it from raw metrics on first creation"""
+        exists = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'metrics_hourly'"
+        ).fetchone()
+        if exists:
+            return
+
+        cursor.execute(
+            """
+            CREATE TABLE metrics_hourly (
+                metric_name TEXT NOT NULL,
+                hour_bucket INTEGER NOT NULL,  -- unix microseconds, floored to the hour
+                avg_value REAL NOT NULL,
+                min_value REAL NOT NULL,
+                max_value REAL NOT NULL,
+                sample_count INTEGER NOT NULL,
+                PRIMARY KEY (metric_name, hour_bucket)
+            )
+        """
+        )
+        cursor.execute(
+            f"""
+            INSERT INTO metrics_hourly
+            SELECT metric_name, timestamp - timestamp % {HOUR_US},
+                   AVG(metric_value), MIN(metric_value), MAX(metric_value), COUNT(*)
+            FROM metrics
+            GROUP BY 1, 2
+        """
+        )
+
+    @invalidates_reads
     def save_scan(self, scan_data: dict, scan_type: str = "full") -> int:
         """
         Save scan results to history
@@ -140,85 +397,155 @@ class Database:
         Returns:
             Scan ID
         """
+        # Serialize before opening the connection so the write transaction stays short
+        network = scan_data.get("network", {})
+        summary = {
+            "total_clients": len(network.get("clients", [])),
+            "total_containers": len(scan_data.get("containers", [])),
+            "total_networks": len(network.get("networks", [])),
+            "total_aps": len(network.get("access_points", [])),
+        }
+        timestamp = to_epoch_us(scan_data.get("timestamp") or datetime.now())
+        data_blob = pack_scan_data(scan_data)
+        summary_json = orjson.dumps(summary).decode()
+        metric_rows = self._collect_metrics(scan_data, timestamp)
+
         with self.get_connection() as conn:
             cursor = conn.cursor()
 
-            # Generate summary
-            summary = {
-                "total_clients": len(scan_data.get("network", {}).get("clients", [])),
-                "total_containers": len(scan_data.get("containers", [])),
-                "total_networks": len(scan_data.get("network", {}).get("networks", [])),
-                "total_aps": len(scan_data.get("network", {}).get("access_points", [])),
-            }
-
             cursor.execute(
                 """
-                INSERT INTO scan_history (timestamp, scan_type, data, summary)
-                VALUES (?, ?, ?, ?)
+                INSERT INTO scan_history (
+                    timestamp, scan_type, data, summary,
+                    total_clients, total_containers, total_networks, total_aps
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
             """,
                 (
-                    scan_data.get("timestamp", datetime.now().isoformat()),
+                    timestamp,
                     scan_type,
-                    json.dumps(scan_data),
-                    json.dumps(summary),
+                    data_blob,
+                    summary_json,
+                    *(summary[column] for column in SUMMARY_COLUMNS),
                 ),
             )
 
             scan_id = cursor.lastrowid
 
-            # Save individual metrics
-            self._save_metrics(cursor, scan_data)
-
-            logger.info(f"Saved scan history with ID {scan_id}")
-            return scan_id
+        # Metrics are written in the background; the scan row above stays synchronous for its ID
+        self._queue_metrics(metric_rows)
 
-    def _save_metrics(self, cursor, scan_data: dict):
-        """Save individual metrics for trend analysis"""
-        timestamp = scan_data.get("timestamp", datetime.now().isoformat())
+        logger.info(f"Saved scan history with ID {scan_id}")
+        return scan_id
 
-        metrics = [
-            ("client_count", len(scan_data.get("network", {}).get("clients", []))),
-            ("container_count", len(scan_data.get("containers", []))),
-            ("network_count", len(scan_data.get("network", {}).get("networks", []))),
-            ("ap_count", len(scan_data.get("network", {}).get("access_points", []))),
-        ]
-
-        # Count running vs stopped containers
-        containers = scan_data.get("containers", [])
-        running = sum(1 for c in containers if "running" in c.get("Status", "").lower())
-        stopped = len(containers) - running
-        metrics.extend(
-            [
-                ("containers_running", running),
-                ("containers_stopped", stopped),
-            ]
-        )
-
-        # WiFi signal metrics
-        clients = scan_data.get("network", {}).get("clients", [])
-        wireless_clients = [c for c in clients if not c.get("is_wired", True)]
-        if wireless_clients:
-            signals = [c.get("rssi", 0) for c in wireless_clients if c.get("rssi")]
-            if signals:
-                avg_signal = sum(signals) / len(signals)
-                metrics.append(("avg_wifi_signal", avg_signal))
-
-        for metric_name, metric_value in metrics:
-            cursor.execute(
+    def _queue_metrics(self, metric_rows: list[tuple]):
+        """Hand metric rows to the background writer, starting it on first use"""
+        with self._metrics_writer_lock:
+            if self._metrics_writer is None:
+                self._metrics_writer = threading.Thread(
+                    target=self._metrics_writer_loop, name="metrics-writer", daemon=True
+                )
+                self._metrics_writer.start()
+
+        for row in metric_rows:
+            self._metrics_queue.put(row)
+
+    def _metrics_writer_loop(self):
+        """Drain queued metric rows and commit them in batches"""
+        while True:
+            batch = [self._metrics_queue.get()]
+            deadline = time.monotonic() + METRICS_BATCH_WINDOW
+            while len(batch) < METRICS_BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._metrics_queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            try:
+                self._write_metrics(batch)
+            except Exception as e:
+                logger.error(f"Failed to write {len(batch)} metric rows: {e}")
+            finally:
+                for _ in batch:
+                    self._metrics_queue.task_done()
+
+    @invalidates_reads
+    def _write_metrics(self, metric_rows: list[tuple]):
+        """Insert metric rows and fold them into the hourly rollup in one transaction"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.executemany(
                 """
                 INSERT INTO metrics (timestamp, metric_name, metric_value)
                 VALUES (?, ?, ?)
             """,
-                (timestamp, metric_name, metric_value),
+                metric_rows,
             )
+            cursor.executemany(
+                """
+                INSERT INTO metrics_hourly (metric_name, hour_bucket, avg_value, min_value, max_value, sample_count)
+                VALUES (?, ?, ?, ?, ?, 1)
+                ON CONFLICT(metric_name, hour_bucket) DO UPDATE SET
+                    avg_value = (avg_value * sample_count + excluded.avg_value) / (sample_count + 1),
+                    min_value = MIN(min_value, excluded.min_value),
+                    max_value = MAX(max_value, excluded.max_value),
+                    sample_count = sample_count + 1
+            """,
+                [(name, ts - ts % HOUR_US, value, value, value) for ts, name, value in metric_rows],
+            )
+
+    def flush(self):
+        """Block until all queued metric rows have been written"""
+        self._metrics_queue.join()
 
+    def _collect_metrics(self, scan_data: dict, timestamp: int) -> list[tuple]:
+        """Build the metric rows saved with each scan for trend analysis"""
+        network = scan_data.get("network", {})
+        clients = network.get("clients", [])
+        containers = scan_data.get("containers", [])
+
+        metrics = [
+            ("client_count", len(clients)),
+            ("container_count", len(containers)),
+            ("network_count", len(network.get("networks", []))),
+            ("ap_count", len(network.get("access_points", []))),
+        ]
+
+        # Count running vs stopped containers in one pass
+        running = 0
+        for container in containers:
+            status = container.get("Status")
+            if status and "running" in status.lower():
+                running += 1
+        metrics.append(("containers_running", running))
+        metrics.append(("containers_stopped", len(containers) - running))
+
+        # WiFi signal metrics, accumulated without building intermediate lists
+        signal_total = 0
+        signal_count = 0
+        for client in clients:
+            if not client.get("is_wired", True):
+                rssi = client.get("rssi")
+                if rssi:
+                    signal_total += rssi
+                    signal_count += 1
+        if signal_count:
+            metrics.append(("avg_wifi_signal", signal_total / signal_count))
+
+        return [(timestamp, metric_name, metric_value) for metric_name, metric_value in metrics]
+
+    @memoized_read
     def get_recent_scans(self, limit: int = 10) -> list[dict]:
         """Get most recent scan summaries"""
         with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 """
-                SELECT id, timestamp, scan_type, summary, created_at
+                SELECT id, timestamp, scan_type, created_at,
+                       total_clients, total_containers, total_networks, total_aps
                 FROM scan_history
                 ORDER BY timestamp DESC
                 LIMIT ?
@@ -228,12 +555,13 @@ class Database:
 
             scans = []
             for row in cursor.fetchall():
+                summary = {column: row[column] for column in SUMMARY_COLUMNS if row[column] is not None}
                 scans.append(
                     {
                         "id": row["id"],
-                        "timestamp": row["timestamp"],
+                        "timestamp": from_epoch_us(row["timestamp"]),
                         "scan_type": row["scan_type"],
-                        "summary": json.loads(row["summary"]) if row["summary"] else {},
+                        "summary": summary,
                         "created_at": row["created_at"],
                     }
                 )
@@ -256,48 +584,156 @@ class Database:
             row = cursor.fetchone()
             if row:
                 return {
-                    "timestamp": row["timestamp"],
+                    "timestamp": from_epoch_us(row["timestamp"]),
                     "scan_type": row["scan_type"],
-                    "data": json.loads(row["data"]),
-                    "summary": json.loads(row["summary"]) if row["summary"] else {},
+                    "data": unpack_scan_data(row["data"]),
+                    "summary": orjson.loads(row["summary"]) if row["summary"] else {},
                 }
             return None
 
-    def get_metric_history(self, metric_name: str, hours: int = 24) -> list[dict]:
-        """Get metric history for specified time period"""
+    def get_scans_by_ids(self, scan_ids: list[int]) -> dict[int, dict]:
+        """Get full scan data for several IDs in one query, keyed by ID"""
+        if not scan_ids:
+            return {}
+
         with self.get_connection() as conn:
             cursor = conn.cursor()
+            placeholders = ",".join("?" * len(scan_ids))
             cursor.execute(
-                """
-                SELECT timestamp, metric_value, metadata
-                FROM metrics
-                WHERE metric_name = ?
-                AND datetime(timestamp) >= datetime('now', '-' || ? || ' hours')
-                ORDER BY timestamp ASC
+                f"""
+                SELECT id, timestamp, scan_type, data, summary
+                FROM scan_history
+                WHERE id IN ({placeholders})
             """,
-                (metric_name, hours),
+                tuple(scan_ids),
             )
 
-            return [
-                {
-                    "timestamp": row["timestamp"],
-                    "value": row["metric_value"],
-                    "metadata": json.loads(row["metadata"]) if row["metadata"] else {},
+            return {
+                row["id"]: {
+                    "timestamp": from_epoch_us(row["timestamp"]),
+                    "scan_type": row["scan_type"],
+                    "data": unpack_scan_data(row["data"]),
+                    "summary": orjson.loads(row["summary"]) if row["summary"] else {},
                 }
                 for row in cursor.fetchall()
-            ]
+            }
+
+    def get_scans_json_by_ids(self, scan_ids: list[int]) -> dict[int, bytes]:
+        """
+        Get serialized scans for several IDs, keyed by ID
+
+        Each value is the JSON body get_scan_by_id() would produce, spliced
+        from the stored bytes so scan data is never parsed and re-encoded.
+        """
+        if not scan_ids:
+            return {}
+
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            placeholders = ",".join("?" * len(scan_ids))
+            cursor.execute(
+                f"""
+                SELECT id, timestamp, scan_type, data, summary
+                FROM scan_history
+                WHERE id IN ({placeholders})
+            """,
+                tuple(scan_ids),
+            )
+            rows = cursor.fetchall()
+
+        scans = {}
+        for row in rows:
+            header = orjson.dumps({"timestamp": from_epoch_us(row["timestamp"]), "scan_type": row["scan_type"]})
+            summary = row["summary"].encode() if row["summary"] else b"{}"
+            scans[row["id"]] = (
+                header[:-1] + b',"summary":' + summary + b',"data":' + unpack_scan_json(row["data"]) + b"}"
+            )
+        return scans
+
+    @memoized_read
+    def get_metric_history_batch(self, metric_names: tuple[str, ...], hours: int = 24) -> dict[str, list[dict]]:
+        """
+        Get history for several metrics in one query, keyed by metric name
+
+        Ranges longer than ROLLUP_MIN_HOURS return hourly averages, with the
+        bucket's min, max and sample count in each point's metadata.
+        """
+        history = {name: [] for name in metric_names}
+        if not metric_names:
+            return history
+
+        # Include rows still queued for the background writer
+        self.flush()
+
+        placeholders = ",".join("?" * len(metric_names))
+        cutoff = cutoff_timestamp(hours=hours)
 
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+
+            if hours > ROLLUP_MIN_HOURS:
+                cursor.execute(
+                    f"""
+                    SELECT metric_name, hour_bucket, avg_value, min_value, max_value, sample_count
+                    FROM metrics_hourly
+                    WHERE metric_name IN ({placeholders})
+                    AND hour_bucket >= ?
+                    ORDER BY hour_bucket ASC
+                """,
+                    (*metric_names, cutoff - cutoff % HOUR_US),
+                )
+                for row in cursor.fetchall():
+                    history[row["metric_name"]].append(
+                        {
+                            "timestamp": from_epoch_us(row["hour_bucket"]),
+                            "value": row["avg_value"],
+                            "metadata": {
+                                "min": row["min_value"],
+                                "max": row["max_value"],
+                                "count": row["sample_count"],
+                            },
+                        }
+                    )
+                return history
+
+            cursor.execute(
+                f"""
+                SELECT metric_name, timestamp, metric_value, metadata
+                FROM metrics
+                WHERE metric_name IN ({placeholders})
+                AND timestamp >= ?
+                ORDER BY timestamp ASC
+            """,
+                (*metric_names, cutoff),
+            )
+            for row in cursor.fetchall():
+                history[row["metric_name"]].append(
+                    {
+                        "timestamp": from_epoch_us(row["timestamp"]),
+                        "value": row["metric_value"],
+                        "metadata": orjson.loads(row["metadata"]) if row["metadata"] else {},
+                    }
+                )
+            return history
+
+    def get_metric_history(self, metric_name: str, hours: int = 24) -> list[dict]:
+        """Get metric history for specified time period"""
+        return self.get_metric_history_batch((metric_name,), hours=hours)[metric_name]
+
+    @invalidates_reads
     def cleanup_old_data(self, days: int = 30):
         """Remove scan data older than specified days"""
+        cutoff = cutoff_timestamp(days=days)
+
         with self.get_connection() as conn:
             cursor = conn.cursor()
 
             cursor.execute(
                 """
                 DELETE FROM scan_history
-                WHERE datetime(timestamp) < datetime('now', '-' || ? || ' days')
+                WHERE timestamp < ?
             """,
-                (days,),
+                (cutoff,),
             )
 
             deleted_scans = cursor.rowcount
@@ -305,25 +741,24 @@ class Database:
             cursor.execute(
                 """
                 DELETE FROM metrics
-                WHERE datetime(timestamp) < datetime('now', '-' || ? || ' days')
+                WHERE timestamp < ?
             """,
-                (days,),
+                (cutoff,),
             )
 
             deleted_metrics = cursor.rowcount
 
+            cursor.execute("DELETE FROM metrics_hourly WHERE hour_bucket < ?", (cutoff - cutoff % HOUR_US,))
+
             logger.info(f"Cleaned up {deleted_scans} old scans and {deleted_metrics} old metrics")
 
             return {"deleted_scans": deleted_scans, "deleted_metrics": deleted_metrics}
 
     def get_setting(self, key: str, default: str = None) -> str:
-        """Get a single setting value"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT value FROM settings WHERE key = ?", (key,))
-            row = cursor.fetchone()
-            return row["value"] if row else default
+        """Get a single setting value, served from the memoized settings table"""
+        return self.get_all_settings().get(key, default)
 
+    @memoized_read
     def get_all_settings(self) -> dict:
         """Get all settings as a dictionary"""
         with self.get_connection() as conn:
@@ -331,33 +766,23 @@ class Database:
             cursor.execute("SELECT key, value FROM settings")
             return {row["key"]: row["value"] for row in cursor.fetchall()}
 
+    @invalidates_reads
     def set_setting(self, key: str, value: str):
         """Set a single setting value"""
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute(
-                """
-                INSERT OR REPLACE INTO settings (key, value, updated_at)
-                VALUES (?, ?, datetime('now'))
-            """,
-                (key, value),
-            )
+            cursor.execute(UPSERT_SETTING_SQL, (key, value))
             logger.debug(f"Setting updated: {key} = {value}")
 
+    @invalidates_reads
     def update_settings(self, settings: dict):
         """Update multiple settings at once"""
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            for key, value in settings.items():
-                cursor.execute(
-                    """
-                    INSERT OR REPLACE INTO settings (key, value, updated_at)
-                    VALUES (?, ?, datetime('now'))
-                """,
-                    (key, str(value)),
-                )
+            cursor.executemany(UPSERT_SETTING_SQL, [(key, str(value)) for key, value in settings.items()])
             logger.info(f"Updated {len(settings)} settings")
 
+    @invalidates_reads
     def save_diagram_template(self, name: str, options: dict) -> int:
         """
         Save a diagram template
@@ -369,19 +794,26 @@ class Database:
         Returns:
             Template ID
         """
+        options_json = orjson.dumps(options).decode()
+
         with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 """
-                INSERT OR REPLACE INTO diagram_templates (name, options, updated_at)
+                INSERT INTO diagram_templates (name, options, updated_at)
                 VALUES (?, ?, datetime('now'))
+                ON CONFLICT(name) DO UPDATE SET
+                    options = excluded.options,
+                    updated_at = excluded.updated_at
+                RETURNING id
             """,
-                (name, json.dumps(options)),
+                (name, options_json),
             )
-            template_id = cursor.lastrowid
+            template_id = cursor.fetchone()["id"]
             logger.info(f"Saved diagram template: {name}")
             return template_id
 
+    @memoized_read
     def get_diagram_templates(self) -> list[dict]:
         """Get all diagram templates"""
         with self.get_connection() as conn:
@@ -399,7 +831,7 @@ class Database:
                     {
                         "id": row["id"],
                         "name": row["name"],
-                        "options": json.loads(row["options"]),
+                        "options": orjson.loads(row["options"]),
                         "created_at": row["created_at"],
                         "updated_at": row["updated_at"],
                     }
@@ -407,28 +839,13 @@ class Database:
             return templates
 
     def get_diagram_template(self, name: str) -> dict:
-        """Get a specific diagram template by name"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                SELECT id, name, options, created_at, updated_at
-                FROM diagram_templates
-                WHERE name = ?
-            """,
-                (name,),
-            )
-            row = cursor.fetchone()
-            if row:
-                return {
-                    "id": row["id"],
-                    "name": row["name"],
-                    "options": json.loads(row["options"]),
-                    "created_at": row["created_at"],
-                    "updated_at": row["updated_at"],
-                }
-            return None
+        """Get a specific diagram template by name, served from the memoized template list"""
+        for template in self.get_diagram_templates():
+            if template["name"] == name:
+                return template
+        return None
 
+    @invalidates_reads
     def delete_diagram_template(self, name: str) -> bool:
         """Delete a diagram template"""
         with self.get_connection() as conn:
@@ -4,8 +4,19 @@ Network Topology Diagram Generator
 Generates hierarchical network topology diagrams using Graphviz
 """
 
-from graphviz import Digraph
-from typing import Dict, List, Any, Tuple
+import functools
+import hashlib
+import ipaddress
+import os
+import subprocess
+import tempfile
+import threading
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from operator import countOf, methodcaller
+from typing import Dict, List, Any, Iterable, Optional, Tuple
+
+import orjson
 
 
 # Node icons (Unicode/Emoji)
@@ -45,9 +56,142 @@ DARK_THEME_STYLES = {
     'group': {'fillcolor': '#2a2a2a', 'color': '#757575', 'fontcolor': '#e0e0e0', 'style': 'rounded,filled,dashed'},
 }
 
+# Fully merged per-theme node attributes, built once and passed to graphviz by reference
+THEME_NODE_STYLES = {
+    'light': NODE_STYLES,
+    'dark': {node_type: {**NODE_STYLES[node_type], **overrides} for node_type, overrides in DARK_THEME_STYLES.items()},
+}
+
+
+# Graph-level attributes, built once; graphviz copies them into each Digraph
+_BASE_GRAPH_ATTR = {
+    'rankdir': 'TB',  # Top to Bottom
+    'fontname': 'Arial',
+    'pad': '0.5',
+    'labelloc': 't',
+    'label': 'Network Topology Diagram',
+    'fontsize': '16'
+}
+_THEME_GRAPH_ATTR = {
+    False: {'bgcolor': 'white', 'fontcolor': '#000000'},
+    True: {'bgcolor': '#1a1a1a', 'fontcolor': '#ffffff'},  # dark
+}
+_LAYOUT_GRAPH_ATTR = {
+    False: {'splines': 'ortho', 'nodesep': '0.6', 'ranksep': '1.0'},  # Orthogonal edges
+    # Straight, merged edges with tighter spacing keep layout time manageable on large graphs
+    True: {'splines': 'line', 'nodesep': '0.3', 'ranksep': '0.5', 'concentrate': 'true'},
+}
+# Keyed by (dark theme, large graph)
+GRAPH_ATTRS = {
+    (dark, large): {**_BASE_GRAPH_ATTR, **_LAYOUT_GRAPH_ATTR[large], **_THEME_GRAPH_ATTR[dark]}
+    for dark in (False, True)
+    for large in (False, True)
+}
+NODE_ATTR = {
+    'shape': 'box',
+    'style': 'rounded,filled',
+    'fontname': 'Arial',
+    'fontsize': '10',
+    'margin': '0.3,0.15'
+}
+# Keyed by light theme
+EDGE_ATTRS = {
+    light: {'fontname': 'Arial', 'fontsize': '8', 'color': '#666666' if light else '#cccccc'}
+    for light in (False, True)
+}
+
+# Per-endpoint container clusters
+CLUSTER_STYLES = {
+    'light': {'style': 'rounded,filled', 'fillcolor': '#fafafa', 'color': '#bdbdbd', 'fontcolor': '#424242'},
+    'dark': {'style': 'rounded,filled', 'fillcolor': '#242424', 'color': '#555555', 'fontcolor': '#e0e0e0'},
+}
+
+
 # Smart grouping threshold
 GROUP_THRESHOLD = 50
 
+# Beyond this many items even the group node is skipped and the host label carries the counts
+SUMMARY_THRESHOLD = GROUP_THRESHOLD * 10
+
+# Above this many nodes orthogonal routing dominates dot's runtime, so draw straight edges
+LARGE_GRAPH_NODES = GROUP_THRESHOLD * 2
+
+# Rendered diagrams keyed by a hash of the drawn scan data, options and format.
+# Scans that find an unchanged topology hit this even though their timestamps differ.
+RENDER_CACHE_SIZE = 8
+_render_cache: 'OrderedDict[bytes, bytes]' = OrderedDict()
+_render_cache_lock = threading.Lock()
+
+# dot reads its input from and writes its output to files here; /dev/shm keeps them in memory
+SHM_DIR = '/dev/shm' if os.path.isdir('/dev/shm') and os.access('/dev/shm', os.W_OK) else None
+
+# DOT source and grouping notes per drawn input, so switching formats only re-runs dot
+_source_cache: 'OrderedDict[bytes, Tuple[str, List[str]]]' = OrderedDict()
+
+
+@functools.cache
+def _graphviz() -> Tuple[Any, Any]:
+    """Import graphviz on first use; cached renders and callers that never draw skip it"""
+    from graphviz import Digraph
+    from graphviz.quoting import quote
+    return Digraph, quote
+
+
+@functools.cache
+def theme_node_attrs(theme: str) -> Dict[str, str]:
+    """The theme's node styles preformatted as DOT attribute lists, for node lines written straight into the graph body"""
+    quote = _graphviz()[1]
+    return {
+        node_type: ' '.join(f'{quote(key)}={quote(value)}' for key, value in sorted(style.items()))
+        for node_type, style in THEME_NODE_STYLES[theme].items()
+    }
+
+
+@functools.cache
+def theme_cluster_attrs(theme: str) -> str:
+    """The theme's endpoint cluster style preformatted as a DOT attribute list"""
+    quote = _graphviz()[1]
+    return ' '.join(f'{quote(key)}={quote(value)}' for key, value in sorted(CLUSTER_STYLES[theme].items()))
+
+
+@functools.lru_cache(maxsize=1024)
+def endpoint_node_id(portainer: str, endpoint: str) -> str:
+    """Node ID suffix for a Portainer endpoint, cached since the same hosts recur on every scan"""
+    return f"{portainer}_{endpoint}".replace(':', '_').replace(' ', '_')
+
+
+@functools.lru_cache(maxsize=1024)
+def truncate_image(image: str) -> str:
+    """Shorten long image names, cached since many containers share an image"""
+    return image[:27] + '...' if len(image) > 30 else image
+
+
+def build_container_nodes(containers: List[Dict[str, Any]], endpoint_id: str, style_attrs: str) -> List[str]:
+    """
+    Build DOT node statements for the containers under one endpoint
+
+    Args:
+        containers: Containers drawn individually under the endpoint
+        endpoint_id: Sanitized endpoint ID used as the node ID prefix
+        style_attrs: Preformatted container attributes from theme_node_attrs()
+
+    Returns:
+        DOT node lines ready for the graph body
+    """
+    icon = ICONS['container']
+    _quote = _graphviz()[1]
+    truncate = truncate_image
+    out = []
+    append = out.append
+    for idx, container in enumerate(containers):
+        name = container.get('Names', ['Unknown'])[0].lstrip('/')
+        image = truncate(container.get('Image', 'Unknown'))
+        status = container.get('State', 'unknown')
+
+        label = f'{icon} {name}\\n{image}\\n{status}'
+        append(f'\t{_quote(f"container_{endpoint_id}_{idx}")} [label={_quote(label)} {style_attrs}]\n')
+    return out
+
 
 class TopologyDiagramGenerator:
     """Generates network topology diagrams using Graphviz"""
@@ -63,71 +207,165 @@ class TopologyDiagramGenerator:
         self.scan_data = scan_data
         self.options = options
         self.graph = None
+        self._dot_source = None
         self.theme = options.get('theme', 'light')
-        self.node_styles = DARK_THEME_STYLES if self.theme == 'dark' else NODE_STYLES
+        self._theme_key = 'dark' if self.theme == 'dark' else 'light'
+        # Set by _create_graph, which loads graphviz
+        self.node_attrs = None
+        self._quote = None
 
         # Endpoint filtering
         self.included_endpoints = options.get('included_endpoints', [])
 
+        # 'overview' draws hosts with counts only; 'full' draws every container and VM
+        self.overview = options.get('detail_level', 'full') == 'overview'
+
         # Data extraction
         self.network = scan_data.get('network', {})
         self.containers = scan_data.get('containers', [])
         self.vms = scan_data.get('vms', [])
 
+        # Node IDs for each network, built once for both the node and edge passes
+        self._network_ids = [
+            (network, f"net_{network.get('name', 'unknown').replace(' ', '_')}")
+            for network in self.network.get('networks', [])
+        ]
+        self._first_network_id = self._network_ids[0][1] if self._network_ids else None
+
+        # Subnet lookup for placing hosts under the network they actually sit on
+        self._subnets = []
+        for network, node_id in self._network_ids:
+            try:
+                self._subnets.append((ipaddress.ip_network(network.get('ip_subnet', ''), strict=False), node_id))
+            except ValueError:
+                continue
+        self._ip_network_cache: Dict[str, Optional[str]] = {}
+
         # Grouping info
         self.grouped_items = []
 
-    def generate(self, format: str = 'png') -> bytes:
+        # Set once the internet node is drawn, so edges only point at nodes that exist
+        self._has_internet = False
+
+        # Layout decided while adding nodes, reused when adding edges:
+        # (endpoint_id, owning network node ID or None) per included endpoint;
+        # its containers sit in a cluster, so need no edges
+        self._endpoint_ids: List[Tuple[str, Optional[str]]] = []
+        # (individual VM count, has group node)
+        self._vm_layout: Tuple[int, bool] = (0, False)
+
+    def generate(self, format: str = 'png', use_cache: bool = True) -> bytes:
         """
         Generate diagram and return as bytes
 
         Args:
             format: Output format ('png' or 'svg')
+            use_cache: Reuse a previous render of identical input
 
         Returns:
             Binary diagram data
         """
-        self._create_graph()
-        self._add_nodes()
-        self._add_edges()
-        return self._render(format)
+        return self.generate_multi([format], use_cache=use_cache)[format]
+
+    def generate_multi(self, formats: List[str], use_cache: bool = True) -> Dict[str, bytes]:
+        """
+        Generate the diagram in several formats from one DOT source
+
+        Formats that are not cached are rendered by concurrent dot processes,
+        so a PNG+SVG export takes about as long as the slower of the two.
+
+        Args:
+            formats: Output formats ('png' and/or 'svg')
+            use_cache: Reuse previous renders of identical input
+
+        Returns:
+            Binary diagram data per format
+        """
+        content_key = self._content_key() if use_cache else None
+        results = {}
+        cached_source = None
+        if content_key is not None:
+            with _render_cache_lock:
+                for fmt in formats:
+                    cached = _render_cache.get(content_key + fmt.encode())
+                    if cached is not None:
+                        _render_cache.move_to_end(content_key + fmt.encode())
+                        results[fmt] = cached
+                cached_source = _source_cache.get(content_key)
+                if cached_source is not None:
+                    _source_cache.move_to_end(content_key)
+
+        pending = [fmt for fmt in dict.fromkeys(formats) if fmt not in results]
+        if not pending:
+            return {fmt: results[fmt] for fmt in formats}
+
+        if cached_source is not None:
+            self._dot_source, grouped_items = cached_source
+            self.grouped_items = list(grouped_items)
+        else:
+            self._create_graph()
+            self._add_nodes()
+            self._add_edges()
+            self._dot_source = self.graph.source
+
+        if len(pending) == 1:
+            rendered = {pending[0]: self._render(pending[0])}
+        else:
+            # Each dot process lays out independently, so run them side by side
+            with ThreadPoolExecutor(max_workers=len(pending)) as executor:
+                rendered = dict(zip(pending, executor.map(self._render, pending)))
+        results.update(rendered)
+
+        if content_key is not None:
+            with _render_cache_lock:
+                for fmt, diagram_bytes in rendered.items():
+                    _render_cache[content_key + fmt.encode()] = diagram_bytes
+                while len(_render_cache) > RENDER_CACHE_SIZE:
+                    _render_cache.popitem(last=False)
+                _source_cache[content_key] = (self._dot_source, list(self.grouped_items))
+                if len(_source_cache) > RENDER_CACHE_SIZE:
+                    _source_cache.popitem(last=False)
+        return {fmt: results[fmt] for fmt in formats}
+
+    def _content_key(self) -> bytes:
+        """Stable hash of the drawn scan data and options"""
+        drawn = {'network': self.network, 'containers': self.containers, 'vms': self.vms}
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(orjson.dumps(drawn, option=orjson.OPT_SORT_KEYS))
+        digest.update(orjson.dumps(self.options, option=orjson.OPT_SORT_KEYS))
+        return digest.digest()
 
     def _create_graph(self) -> None:
         """Initialize Graphviz Digraph with styling"""
-        bg_color = '#1a1a1a' if self.theme == 'dark' else 'white'
-        text_color = '#ffffff' if self.theme == 'dark' else '#000000'
+        total_nodes = (
+            len(self.network.get('clients', [])) + len(self.containers) + len(self.vms)
+            + len(self._network_ids) + len(self.network.get('access_points', []))
+        )
+        large = total_nodes > LARGE_GRAPH_NODES
+
+        Digraph, self._quote = _graphviz()
+        self.node_attrs = theme_node_attrs(self._theme_key)
+        self._cluster_attrs = theme_cluster_attrs(self._theme_key)
 
         self.graph = Digraph(
             name='NetworkTopology',
             format='png',
             engine='dot',  # Hierarchical layout
-            graph_attr={
-                'rankdir': 'TB',  # Top to Bottom
-                'splines': 'ortho',  # Orthogonal edges
-                'nodesep': '0.6',
-                'ranksep': '1.0',
-                'bgcolor': bg_color,
-                'fontname': 'Arial',
-                'fontcolor': text_color,
-                'pad': '0.5',
-                'labelloc': 't',
-                'label': 'Network Topology Diagram',
-                'fontsize': '16'
-            },
-            node_attr={
-                'shape': 'box',
-                'style': 'rounded,filled',
-                'fontname': 'Arial',
-                'fontsize': '10',
-                'margin': '0.3,0.15'
-            },
-            edge_attr={
-                'fontname': 'Arial',
-                'fontsize': '8',
-                'color': '#666666' if self.theme == 'light' else '#cccccc'
-            }
+            graph_attr=GRAPH_ATTRS[(self.theme == 'dark', large)],
+            node_attr=NODE_ATTR,
+            edge_attr=EDGE_ATTRS[self.theme == 'light']
         )
 
+    def _node_line(self, node_id: str, label: str, node_type: str) -> str:
+        """Format a styled DOT node statement"""
+        quote = self._quote
+        return f'\t{quote(node_id)} [label={quote(label)} {self.node_attrs[node_type]}]\n'
+
+    def _edge_line(self, tail: str, head: str) -> str:
+        """Format a DOT edge statement"""
+        quote = self._quote
+        return f'\t{quote(tail)} -> {quote(head)}\n'
+
     def _format_node_label(self, node_type: str, name: str, details: str = '') -> str:
         """Format node label with icon and text"""
         icon = ICONS.get(node_type, '•')
@@ -136,6 +374,39 @@ class TopologyDiagramGenerator:
             label += f'\\n{details}'
         return label
 
+    def _network_for_ips(self, ips: Iterable[str]) -> Optional[str]:
+        """Node ID of the first network whose subnet contains one of the IPs"""
+        if not self._subnets:
+            return None
+        cache = self._ip_network_cache
+        for ip in ips:
+            if ip in cache:
+                network_id = cache[ip]
+            else:
+                network_id = None
+                try:
+                    address = ipaddress.ip_address(ip)
+                except ValueError:
+                    address = None
+                if address is not None:
+                    for subnet, node_id in self._subnets:
+                        if address in subnet:
+                            network_id = node_id
+                            break
+                cache[ip] = network_id
+            if network_id:
+                return network_id
+        return None
+
+    @staticmethod
+    def _container_ips(containers: List[Dict[str, Any]]) -> Iterable[str]:
+        """IP addresses the endpoint's containers hold on Docker networks (macvlan/ipvlan ones sit on the LAN)"""
+        for container in containers:
+            for network in (container.get('NetworkSettings') or {}).get('Networks', {}).values():
+                ip = network.get('IPAddress')
+                if ip:
+                    yield ip
+
     def _should_include_endpoint(self, endpoint_name: str) -> bool:
         """Check if endpoint should be included based on filter"""
         # If no filter specified, include all
@@ -172,27 +443,29 @@ class TopologyDiagramGenerator:
 
     def _add_nodes(self) -> None:
         """Add all nodes to the graph"""
+        # Node statements are collected and appended to the graph body in one go
+        lines = []
+        # Bound once so the per-item loops skip repeated attribute lookups
+        append = lines.append
+        node_line = self._node_line
+        fmt = self._format_node_label
+
         # Internet / Gateway (always show if any network exists)
         if self.network.get('networks') or self.network.get('access_points'):
-            self.graph.node(
-                'internet',
-                label=self._format_node_label('internet', 'Internet'),
-                **self.node_styles['internet']
-            )
+            append(node_line('internet', fmt('internet', 'Internet'), 'internet'))
+            self._has_internet = True
 
         # Networks (VLANs)
         if self.options.get('include_vlans', True):
-            networks = self.network.get('networks', [])
-            for network in networks:
-                node_id = f"net_{network.get('name', 'unknown').replace(' ', '_')}"
+            for network, node_id in self._network_ids:
                 vlan = network.get('vlan', '?')
                 subnet = network.get('ip_subnet', '')
-                label = self._format_node_label(
+                label = fmt(
                     'network',
                     network.get('name', 'Unknown'),
                     f'VLAN {vlan}\\n{subnet}'
                 )
-                self.graph.node(node_id, label=label, **self.node_styles['network'])
+                append(node_line(node_id, label, 'network'))
 
         # Access Points
         if self.options.get('include_aps', True):
@@ -200,12 +473,12 @@ class TopologyDiagramGenerator:
             for idx, ap in enumerate(aps):
                 node_id = f"ap_{idx}"
                 clients = ap.get('num_sta', 0)
-                label = self._format_node_label(
+                label = fmt(
                     'ap',
                     ap.get('name', 'Access Point'),
                     f"{ap.get('model', 'Unknown')}\\n{clients} clients"
                 )
-                self.graph.node(node_id, label=label, **self.node_styles['ap'])
+                append(node_line(node_id, label, 'ap'))
 
         # Network Clients (IoT devices)
         if self.options.get('include_iot_devices', True):
@@ -226,80 +499,82 @@ class TopologyDiagramGenerator:
                     if rssi:
                         details += f"\\nSignal: {rssi} dBm"
 
-                label = self._format_node_label(client_type, hostname, details)
-                self.graph.node(node_id, label=label, **self.node_styles['client'])
+                label = fmt(client_type, hostname, details)
+                append(node_line(node_id, label, 'client'))
 
             # Add grouped clients
             for group in grouped_clients:
                 node_id = f"client_group"
-                label = self._format_node_label('network', group['name'])
-                self.graph.node(node_id, label=label, **self.node_styles['group'])
+                label = fmt('network', group['name'])
+                append(node_line(node_id, label, 'group'))
 
         # Docker Containers - Group by Portainer endpoint
         if self.options.get('include_containers', True):
-            # Group containers by endpoint
-            endpoints_map = {}
+            # Group containers by (portainer instance, endpoint), counting running ones in the same pass
+            endpoints_map = defaultdict(list)
+            running_counts = defaultdict(int)
             for container in self.containers:
-                portainer_instance = container.get('portainer_instance', 'Unknown')
-                endpoint_name = container.get('endpoint_name', 'Unknown')
-                endpoint_key = f"{portainer_instance}:{endpoint_name}"
-
-                if endpoint_key not in endpoints_map:
-                    endpoints_map[endpoint_key] = {
-                        'portainer_instance': portainer_instance,
-                        'endpoint_name': endpoint_name,
-                        'containers': []
-                    }
-                endpoints_map[endpoint_key]['containers'].append(container)
+                endpoint_key = (container.get('portainer_instance', 'Unknown'), container.get('endpoint_name', 'Unknown'))
+                endpoints_map[endpoint_key].append(container)
+                if container.get('State') == 'running':
+                    running_counts[endpoint_key] += 1
 
             # Create endpoint nodes and their containers
-            for endpoint_key, endpoint_data in endpoints_map.items():
-                endpoint_id = endpoint_key.replace(':', '_').replace(' ', '_')
-                portainer = endpoint_data['portainer_instance']
-                endpoint = endpoint_data['endpoint_name']
-                containers = endpoint_data['containers']
+            for endpoint_key, containers in endpoints_map.items():
+                portainer, endpoint = endpoint_key
+                endpoint_id = endpoint_node_id(portainer, endpoint)
 
                 # Apply endpoint filter
                 if not self._should_include_endpoint(endpoint):
                     continue
 
-                # Count running vs stopped
-                running = sum(1 for c in containers if c.get('State') == 'running')
+                running = running_counts[endpoint_key]
 
                 # Create endpoint node (represents the VM/host)
-                endpoint_label = self._format_node_label(
+                endpoint_label = fmt(
                     'vm',
                     f"{endpoint}",
                     f"Portainer: {portainer}\\n{running}/{len(containers)} running"
                 )
-                self.graph.node(f"endpoint_{endpoint_id}", label=endpoint_label, **self.node_styles['vm'])
+                self._endpoint_ids.append((endpoint_id, self._network_for_ips(self._container_ips(containers))))
+
+                # Overview, and hosts too large to draw, stop at the host node, which already carries the counts
+                summarize = len(containers) > SUMMARY_THRESHOLD
+                if summarize:
+                    self.grouped_items.append(f"{len(containers)} {endpoint} containers shown as counts on their host")
+                if self.overview or summarize:
+                    append(node_line(f"endpoint_{endpoint_id}", endpoint_label, 'vm'))
+                    continue
+
+                # The host and its containers share a cluster, so dot lays each endpoint out on its own
+                append(f'\tsubgraph {self._quote(f"cluster_{endpoint_id}")} {{\n')
+                append(f'\t\tgraph [label={self._quote(endpoint)} {self._cluster_attrs}]\n')
+                append(node_line(f"endpoint_{endpoint_id}", endpoint_label, 'vm'))
 
                 # Add containers under this endpoint (with smart grouping per endpoint)
                 individual_containers, grouped_containers = self._apply_smart_grouping(containers, f'{endpoint} containers')
 
                 # Add individual containers
-                for idx, container in enumerate(individual_containers):
-                    node_id = f"container_{endpoint_id}_{idx}"
-                    name = container.get('Names', ['Unknown'])[0].lstrip('/')
-                    image = container.get('Image', 'Unknown')
-                    status = container.get('State', 'unknown')
-
-                    # Truncate long image names
-                    if len(image) > 30:
-                        image = image[:27] + '...'
-
-                    details = f"{image}\\n{status}"
-                    label = self._format_node_label('container', name, details)
-                    self.graph.node(node_id, label=label, **self.node_styles['container'])
+                lines.extend(build_container_nodes(individual_containers, endpoint_id, self.node_attrs['container']))
 
                 # Add grouped containers for this endpoint
                 if grouped_containers:
                     group_id = f"container_group_{endpoint_id}"
-                    label = self._format_node_label('container', grouped_containers[0]['name'])
-                    self.graph.node(group_id, label=label, **self.node_styles['group'])
+                    label = fmt('container', grouped_containers[0]['name'])
+                    append(node_line(group_id, label, 'group'))
+
+                append('\t}\n')
 
         # Proxmox VMs
-        if self.options.get('include_vms', True):
+        if self.options.get('include_vms', True) and self.vms and (self.overview or len(self.vms) > SUMMARY_THRESHOLD):
+            # Overview, or a VM list too large to group usefully, draws one summary node in place of the individual VMs
+            if not self.overview:
+                self.grouped_items.append(f"{len(self.vms)} VMs shown as a summary")
+            running = countOf(map(methodcaller('get', 'status'), self.vms), 'running')
+            label = fmt('vm', f"{len(self.vms)} VMs", f"{running}/{len(self.vms)} running")
+            append(node_line('vm_group', label, 'group'))
+            self._vm_layout = (0, True)
+        elif self.options.get('include_vms', True):
             individual_vms, grouped_vms = self._apply_smart_grouping(self.vms, 'VMs')
 
             # Add individual VMs
@@ -312,96 +587,68 @@ class TopologyDiagramGenerator:
 
                 icon_type = 'vm' if vm_type == 'qemu' else 'vm_lxc'
                 details = f"Node: {node}\\nStatus: {status}"
-                label = self._format_node_label(icon_type, name, details)
-                self.graph.node(node_id, label=label, **self.node_styles['vm'])
+                label = fmt(icon_type, name, details)
+                append(node_line(node_id, label, 'vm'))
 
             # Add grouped VMs
             for group in grouped_vms:
                 node_id = f"vm_group"
-                label = self._format_node_label('vm', group['name'])
-                self.graph.node(node_id, label=label, **self.node_styles['group'])
+                label = fmt('vm', group['name'])
+                append(node_line(node_id, label, 'group'))
+
+            self._vm_layout = (len(individual_vms), bool(grouped_vms))
+
+        self.graph.body.extend(lines)
 
     def _add_edges(self) -> None:
         """Add edges (connections) between nodes"""
+        # Edge statements are collected and appended to the graph body in one go
+        lines = []
+        append = lines.append
+        edge_line = self._edge_line
+
         # Simple hierarchical connections
         # Internet -> Networks
-        if self.options.get('include_vlans', True):
-            networks = self.network.get('networks', [])
-            for network in networks:
-                node_id = f"net_{network.get('name', 'unknown').replace(' ', '_')}"
-                if self.graph.body:  # Check if internet node exists
-                    self.graph.edge('internet', node_id)
+        if self.options.get('include_vlans', True) and self._has_internet:
+            for _, node_id in self._network_ids:
+                append(edge_line('internet', node_id))
 
         # Networks -> Access Points
         if self.options.get('include_aps', True) and self.options.get('include_vlans', True):
             aps = self.network.get('access_points', [])
-            networks = self.network.get('networks', [])
-            if networks and aps:
+            if self._first_network_id and aps:
                 # Connect APs to first network (simplified)
-                first_network = f"net_{networks[0].get('name', 'unknown').replace(' ', '_')}"
+                first_network = self._first_network_id
                 for idx, ap in enumerate(aps):
                     ap_id = f"ap_{idx}"
-                    self.graph.edge(first_network, ap_id)
+                    append(edge_line(first_network, ap_id))
 
-        # Connect Endpoints (VMs/hosts) to network and containers to endpoints
+        # Connect Endpoints (VMs/hosts) to network; their containers are grouped by cluster instead of edges
         if self.options.get('include_containers', True) and self.options.get('include_vlans', True):
-            networks = self.network.get('networks', [])
-            if networks and self.containers:
-                first_network = f"net_{networks[0].get('name', 'unknown').replace(' ', '_')}"
-
-                # Group containers by endpoint to get the structure
-                endpoints_map = {}
-                for container in self.containers:
-                    portainer_instance = container.get('portainer_instance', 'Unknown')
-                    endpoint_name = container.get('endpoint_name', 'Unknown')
-                    endpoint_key = f"{portainer_instance}:{endpoint_name}"
-
-                    if endpoint_key not in endpoints_map:
-                        endpoints_map[endpoint_key] = {
-                            'containers': []
-                        }
-                    endpoints_map[endpoint_key]['containers'].append(container)
+            if self._first_network_id and self.containers:
+                first_network = self._first_network_id
 
-                # Connect each endpoint to network
-                for endpoint_key, endpoint_data in endpoints_map.items():
-                    endpoint_id = endpoint_key.replace(':', '_').replace(' ', '_')
-                    containers = endpoint_data['containers']
+                # Reuse the endpoints kept in _add_nodes (filtered endpoints were skipped there)
+                for endpoint_id, network_id in self._endpoint_ids:
+                    # Network -> Endpoint (VM/host), falling back to the first network when the subnet is unknown
+                    append(edge_line(network_id or first_network, f"endpoint_{endpoint_id}"))
 
-                    # Extract endpoint name for filtering
-                    endpoint_name = endpoint_key.split(':')[1] if ':' in endpoint_key else endpoint_key
-
-                    # Apply endpoint filter
-                    if not self._should_include_endpoint(endpoint_name):
-                        continue
-
-                    # Network -> Endpoint (VM/host)
-                    self.graph.edge(first_network, f"endpoint_{endpoint_id}")
-
-                    # Endpoint -> Containers
-                    individual_containers, grouped_containers = self._apply_smart_grouping(containers, f'{endpoint_key} containers')
-
-                    if individual_containers:
-                        for idx in range(len(individual_containers)):
-                            self.graph.edge(f"endpoint_{endpoint_id}", f"container_{endpoint_id}_{idx}")
-
-                    if grouped_containers:
-                        self.graph.edge(f"endpoint_{endpoint_id}", f"container_group_{endpoint_id}")
-
-        # Connect VMs to networks (simplified - connect to first network)
+        # Connect VMs to the network matching their IPs (first network when unknown)
         if self.options.get('include_vms', True) and self.options.get('include_vlans', True):
-            networks = self.network.get('networks', [])
-            if networks and self.vms:
-                first_network = f"net_{networks[0].get('name', 'unknown').replace(' ', '_')}"
+            if self._first_network_id and self.vms:
+                first_network = self._first_network_id
+                network_for_ips = self._network_for_ips
 
-                # Check if we have individual VMs or grouped
-                individual_vms, grouped_vms = self._apply_smart_grouping(self.vms, 'VMs')
+                # Reuse the VM grouping decided in _add_nodes; individual VMs are drawn in list order
+                individual_count, has_group = self._vm_layout
+                for idx in range(individual_count):
+                    network_id = network_for_ips(self.vms[idx].get('ip_addresses') or ())
+                    append(edge_line(network_id or first_network, f"vm_{idx}"))
 
-                if individual_vms:
-                    for idx in range(len(individual_vms)):
-                        self.graph.edge(first_network, f"vm_{idx}")
+                if has_group:
+                    append(edge_line(first_network, "vm_group"))
 
-                if grouped_vms:
-                    self.graph.edge(first_network, "vm_group")
+        self.graph.body.extend(lines)
 
         # Simple note about grouped items
         if self.grouped_items:
@@ -421,12 +668,22 @@ class TopologyDiagramGenerator:
         Returns:
             Binary diagram data
         """
-        self.graph.format = format
-
         try:
-            # Render to bytes
-            diagram_bytes = self.graph.pipe(format=format)
-            return diagram_bytes
+            # Hand dot files instead of pipes so large outputs are not pushed through the pipe buffer
+            with tempfile.TemporaryDirectory(prefix='topology_', dir=SHM_DIR) as tmp_dir:
+                source_path = os.path.join(tmp_dir, 'topology.dot')
+                output_path = os.path.join(tmp_dir, f'topology.{format}')
+                with open(source_path, 'w', encoding='utf-8') as f:
+                    f.write(self._dot_source)
+                subprocess.run(
+                    ['dot', f'-T{format}', source_path, '-o', output_path],
+                    capture_output=True,
+                    check=True
+                )
+                with open(output_path, 'rb') as f:
+                    return f.read()
+        except subprocess.CalledProcessError as e:
+            raise RuntimeError(f"Failed to render diagram: {e.stderr.decode(errors='replace').strip()}")
         except Exception as e:
             raise RuntimeError(f"Failed to render diagram: {e}")
 
@@ -1,7 +1,7 @@
 import React, { useState, useEffect, createContext, useContext, useCallback } from 'react';
 import { Toaster, toast } from 'sonner';
 import { fetchScanData, triggerScan, fetchApiStatus, ScanData, ApiStatus } from './api';
-import { useWebSocket } from './hooks/useWebSocket';
+import { useWebSocket, ScanProgressData } from './hooks/useWebSocket';
 import Alerts from './components/Alerts';
 import NetworksTable from './components/NetworksTable';
 import AccessPointsTable from './components/AccessPointsTable';
@@ -62,6 +62,8 @@ const App: React.FC = () => {
   const [loading, setLoading] = useState<boolean>(true);
   const [searchQuery, setSearchQuery] = useState<string>(''); // New state for search query
   const [isScanning, setIsScanning] = useState<boolean>(false);
+  const [scanProgress, setScanProgress] = useState<ScanProgressData | null>(null);
+  const [socketConnected, setSocketConnected] = useState<boolean>(false);
   const [showSettings, setShowSettings] = useState<boolean>(false);
   const [showDiagram, setShowDiagram] = useState<boolean>(false);
   const [settings, setSettings] = useState<AppSettings>(DEFAULT_SETTINGS);
@@ -108,11 +110,19 @@ const App: React.FC = () => {
     onScanStarted: () => {
       console.log('WebSocket: Scan started');
       setIsScanning(true);
+      setScanProgress(null);
       toast.info('🔄 Scan started...', { duration: 2000 });
     },
+    onScanProgress: (data) => {
+      setScanProgress(data);
+    },
+    onStatusUpdate: (status) => {
+      setApiStatus(status);
+    },
     onScanCompleted: (data) => {
       console.log('WebSocket: Scan completed', data);
       setIsScanning(false);
+      setScanProgress(null);
       toast.success(`✅ Scan complete! Found ${data.total_clients} clients and ${data.total_containers} containers`, {
         duration: 4000,
       });
@@ -122,13 +132,16 @@ const App: React.FC = () => {
     onScanFailed: (data) => {
       console.log('WebSocket: Scan failed', data);
       setIsScanning(false);
+      setScanProgress(null);
       toast.error(`❌ Scan failed: ${data.error}`, { duration: 5000 });
     },
     onConnect: () => {
       console.log('WebSocket: Connected');
+      setSocketConnected(true);
     },
     onDisconnect: () => {
       console.log('WebSocket: Disconnected');
+      setSocketConnected(false);
     },
   });
 
@@ -136,8 +149,15 @@ const App: React.FC = () => {
     loadAllData();
   }, [loadAllData]);
 
-  // Poll status to update cooldown timer (using settings.statusPollInterval)
+  // Poll status to update cooldown timer (using settings.statusPollInterval).
+  // While the WebSocket is connected, scan status is pushed via status_update,
+  // so polling only runs to tick the cooldown countdown.
+  const inCooldown = apiStatus ? !apiStatus.can_scan : true;
   useEffect(() => {
+    if (socketConnected && !inCooldown) {
+      return;
+    }
+
     const statusInterval = setInterval(async () => {
       try {
         const status = await fetchApiStatus();
@@ -148,7 +168,7 @@ const App: React.FC = () => {
     }, settings.statusPollInterval);
 
     return () => clearInterval(statusInterval);
-  }, [settings.statusPollInterval]);
+  }, [settings.statusPollInterval, socketConnected, inCooldown]);
 
   useEffect(() => {
     if (autoRefreshIntervalRef.current) {
@@ -281,7 +301,7 @@ const App: React.FC = () => {
             ⚙️ Settings
           </button>
           <span className={`status-indicator ${(isScanning || apiStatus?.is_scanning) ? 'status-scanning' : (apiStatus?.can_scan ? 'status-ready' : 'status-cooldown')}`}>
-            {(isScanning || apiStatus?.is_scanning) ? '🔄 Scanning...' : (apiStatus?.can_scan ? '✅ Ready' : `⏱️ Cooldown: ${apiStatus?.cooldown_remaining || 0}s`)}
+            {(isScanning || apiStatus?.is_scanning) ? `🔄 Scanning...${scanProgress ? ` (${scanProgress.completed}/${scanProgress.total})` : ''}` : (apiStatus?.can_scan ? '✅ Ready' : `⏱️ Cooldown: ${apiStatus?.cooldown_remaining || 0}s`)}
           </span>
         </div>
       </div>
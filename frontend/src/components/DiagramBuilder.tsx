@@ -24,6 +24,7 @@ const DEFAULT_OPTIONS: DiagramOptions = {
   include_vlans: true,
   include_aps: true,
   theme: 'light',
+  detail_level: 'full',
   included_endpoints: [], // Empty means all endpoints
 };
 
@@ -369,6 +370,16 @@ setShowSaveDialog(false);
                   />
                   <span>📡 Access Points ({counts.aps})</span>
                 </label>
+
+                <label style={{ display: 'flex', alignItems: 'center', gap: '10px', color: 'var(--text-primary)', cursor: 'pointer' }}>
+                  <input
+                    type="checkbox"
+                    checked={options.detail_level === 'overview'}
+                    onChange={(e) => setOptions({ ...options, detail_level: e.target.checked ? 'overview' : 'full' })}
+                    style={{ width: '18px', height: '18px' }}
+                  />
+                  <span>🔭 Overview only (hosts with counts)</span>
+                </label>
               </div>
 
               {/* Endpoint Filter */}
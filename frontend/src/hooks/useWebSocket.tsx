@@ -1,5 +1,6 @@
 import { useEffect, useRef, useCallback } from 'react';
 import { io, Socket } from 'socket.io-client';
+import { ApiStatus } from '../api';
 
 interface ScanCompletedData {
   timestamp: string;
@@ -12,23 +13,29 @@ interface ScanFailedData {
   error: string;
 }
 
+export interface ScanProgressData {
+  phase: string;
+  completed: number;
+  total: number;
+  pct: number;
+}
+
 interface WebSocketHookOptions {
   onScanStarted?: () => void;
   onScanCompleted?: (data: ScanCompletedData) => void;
   onScanFailed?: (data: ScanFailedData) => void;
+  onScanProgress?: (data: ScanProgressData) => void;
+  onStatusUpdate?: (data: ApiStatus) => void;
   onConnect?: () => void;
   onDisconnect?: () => void;
 }
 
 export const useWebSocket = (options: WebSocketHookOptions = {}) => {
   const socketRef = useRef<Socket | null>(null);
-  const {
-    onScanStarted,
-    onScanCompleted,
-    onScanFailed,
-    onConnect,
-    onDisconnect,
-  } = options;
+  // Latest handlers, read by the socket listeners. Callers usually pass inline
+  // callbacks, so depending on them would reconnect the socket on every render.
+  const handlersRef = useRef(options);
+  handlersRef.current = options;
 
   const connect = useCallback(() => {
     if (socketRef.current?.connected) {
@@ -44,44 +51,52 @@ export const useWebSocket = (options: WebSocketHookOptions = {}) => {
         reconnectionAttempts: 5,
       });
 
-    socket.on('connect', () => {
-      console.log('WebSocket connected');
-      onConnect?.();
-    });
+      socket.on('connect', () => {
+        console.log('WebSocket connected');
+        handlersRef.current.onConnect?.();
+      });
+
+      socket.on('disconnect', () => {
+        console.log('WebSocket disconnected');
+        handlersRef.current.onDisconnect?.();
+      });
+
+      socket.on('scan_started', () => {
+        console.log('Scan started event received');
+        handlersRef.current.onScanStarted?.();
+      });
 
-    socket.on('disconnect', () => {
-      console.log('WebSocket disconnected');
-      onDisconnect?.();
-    });
+      socket.on('scan_completed', (data: ScanCompletedData) => {
+        console.log('Scan completed event received:', data);
+        handlersRef.current.onScanCompleted?.(data);
+      });
 
-    socket.on('scan_started', () => {
-      console.log('Scan started event received');
-      onScanStarted?.();
-    });
+      socket.on('scan_failed', (data: ScanFailedData) => {
+        console.log('Scan failed event received:', data);
+        handlersRef.current.onScanFailed?.(data);
+      });
 
-    socket.on('scan_completed', (data: ScanCompletedData) => {
-      console.log('Scan completed event received:', data);
-      onScanCompleted?.(data);
-    });
+      socket.on('scan_progress', (data: ScanProgressData) => {
+        handlersRef.current.onScanProgress?.(data);
+      });
 
-    socket.on('scan_failed', (data: ScanFailedData) => {
-      console.log('Scan failed event received:', data);
-      onScanFailed?.(data);
-    });
+      socket.on('status_update', (data: ApiStatus) => {
+        handlersRef.current.onStatusUpdate?.(data);
+      });
 
-    socket.on('connect_error', (error) => {
-      console.warn('WebSocket connection error:', error.message);
-    });
+      socket.on('connect_error', (error) => {
+        console.warn('WebSocket connection error:', error.message);
+      });
 
-    socket.on('error', (error) => {
-      console.warn('WebSocket error:', error);
-    });
+      socket.on('error', (error) => {
+        console.warn('WebSocket error:', error);
+      });
 
-    socketRef.current = socket;
+      socketRef.current = socket;
     } catch (error) {
       console.error('Failed to initialize WebSocket:', error);
     }
-  }, [onScanStarted, onScanCompleted, onScanFailed, onConnect, onDisconnect]);
+  }, []);
 
   const disconnect = useCallback(() => {
     if (socketRef.current) {
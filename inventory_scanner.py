@@ -4,61 +4,182 @@ Network Inventory Scanner Module
 Refactored from network_inventory.py to be importable
 """
 
+from __future__ import annotations
+
+import ipaddress
 import re
 import subprocess
+import threading
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import IO
 
+import orjson
 import requests
 import urllib3
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+# Retries for dropped keep-alive connections on idempotent API calls; a host
+# that is unreachable or never answers is only retried once so it can't stall the scan
+HTTP_RETRIES = Retry(total=3, connect=1, read=1, backoff_factor=0.3)
+
+# Seconds an nmap ping sweep may run before it is killed
+NMAP_TIMEOUT = 120
+
+# A subnet is swept by up to NMAP_MAX_PARALLEL nmap processes at once, but
+# never split into chunks of fewer than NMAP_CHUNK_SIZE addresses
+NMAP_MAX_PARALLEL = 4
+NMAP_CHUNK_SIZE = 64
+
+# UniFi device types that act as access points
+_AP_TYPES = frozenset(("uap", "udm", "uxg"))
+
+# Most concurrent container listings per Portainer instance
+ENDPOINT_FETCH_WORKERS = 16
+
+# Most Proxmox cluster nodes scanned at once, and concurrent QEMU config reads per node
+NODE_SCAN_WORKERS = 8
+VM_CONFIG_WORKERS = 8
+
+# MAC address inside a Proxmox netN config value
+_MAC_ADDRESS = re.compile(r"(?:[0-9A-Fa-f]{2}[:-]){5}[0-9A-Fa-f]{2}")
+
+
+def _extract_mac(value) -> str | None:
+    """Extract the MAC address from a Proxmox netN value such as "virtio=AA:BB:CC:DD:EE:FF,bridge=vmbr0"
+
+    The MAC is normally the token after the first "=", so a split is tried
+    before falling back to the regex for other layouts.
+    """
+    if isinstance(value, str):
+        head = value.split("=", 1)
+        if len(head) == 2:
+            candidate = head[1].split(",", 1)[0]
+            if len(candidate) == 17 and candidate[2] == ":":
+                return candidate
+    else:
+        value = str(value)
+    mac_match = _MAC_ADDRESS.search(value)
+    return mac_match.group(0) if mac_match else None
+
 
+_SSL_WARNINGS_DISABLED = False
 
-# Disable SSL warnings for local/self-signed certificates
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+def _disable_ssl_warnings_once():
+    """Silence InsecureRequestWarning once something actually makes unverified requests"""
+    global _SSL_WARNINGS_DISABLED
+    if not _SSL_WARNINGS_DISABLED:
+        # Local/self-signed certificates are the norm for these controllers
+        urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+        _SSL_WARNINGS_DISABLED = True
+
+
+# Guards lazy creation of sessions shared between inventory instances
+_SESSIONS_LOCK = threading.Lock()
+
+
+def create_session(pool_connections: int = 16, pool_maxsize: int = 32) -> requests.Session:
+    """Create a keep-alive HTTP session with a pooled adapter for API clients"""
+    _disable_ssl_warnings_once()
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=HTTP_RETRIES
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["Connection"] = "keep-alive"
+    session.verify = False
+    return session
 
 
 class NetworkScanner:
     """Handles network scanning using nmap"""
 
-    def __init__(self, subnet: str = "192.168.1.0/24"):
+    def __init__(
+        self,
+        subnet: str = "192.168.1.0/24",
+        max_parallel: int = NMAP_MAX_PARALLEL,
+        chunk_size: int = NMAP_CHUNK_SIZE,
+    ):
         self.subnet = subnet
+        self.max_parallel = max_parallel
+        self.chunk_size = chunk_size
+        # Set by start() for the running sweep
+        self._timeout_timer: threading.Timer | None = None
+        self._timed_out = threading.Event()
 
     def scan_network(self) -> list[dict]:
         """Scan network for active devices"""
+        return self.collect(self.start())
+
+    def start(self) -> list[subprocess.Popen]:
+        """Launch the nmap sweep in the background and return its processes, or [] if it can't start
+
+        Callers can do other work while nmap runs and pass the processes to collect().
+        """
         print(f"[*] Scanning network {self.subnet}...")
-        devices = []
 
+        procs = []
         try:
-            result = subprocess.run(
-                ["nmap", "-sn", "-T4", self.subnet], capture_output=True, text=True, timeout=120
-            )
+            for target in self._targets():
+                # Stream stdout so hosts are parsed while nmap is still scanning
+                procs.append(
+                    subprocess.Popen(
+                        self._command(target), stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+                    )
+                )
+        except Exception as e:
+            if isinstance(e, FileNotFoundError):
+                print("[!] nmap not found. Install with: sudo apt install nmap")
+            else:
+                print(f"[!] Error scanning network: {e}")
+            for proc in procs:
+                proc.kill()
+                proc.wait()
+            return []
+
+        # Reading the pipes blocks, so the timeout is enforced by killing nmap
+        self._timed_out.clear()
 
-            current_device = {}
-            for line in result.stdout.split("\n"):
-                if "Nmap scan report for" in line:
-                    if current_device:
-                        devices.append(current_device)
-                    current_device = {}
-                    match = re.search(r"for (.+?) \((.+?)\)", line)
-                    if match:
-                        current_device["hostname"] = match.group(1)
-                        current_device["ip"] = match.group(2)
-                    else:
-                        match = re.search(r"for (.+)$", line)
-                        if match:
-                            current_device["ip"] = match.group(1).strip()
-                            current_device["hostname"] = ""
-
-                elif "MAC Address:" in line:
-                    match = re.search(r"MAC Address: (.+?) \((.+?)\)", line)
-                    if match:
-                        current_device["mac"] = match.group(1)
-                        current_device["vendor"] = match.group(2)
-                    else:
-                        match = re.search(r"MAC Address: (.+)$", line)
-                        if match:
-                            current_device["mac"] = match.group(1).strip()
-
-            if current_device:
-                devices.append(current_device)
+        def kill_on_timeout():
+            self._timed_out.set()
+            for proc in procs:
+                proc.kill()
+
+        self._timeout_timer = threading.Timer(NMAP_TIMEOUT, kill_on_timeout)
+        self._timeout_timer.start()
+        return procs
+
+    def collect(self, procs: list[subprocess.Popen]) -> list[dict]:
+        """Parse the output of a sweep launched by start() and wait for nmap to exit"""
+        if not procs:
+            return []
+
+        try:
+            try:
+                if len(procs) == 1:
+                    devices = self._parse_output(procs[0].stdout)
+                else:
+                    # Drain every pipe at once so no nmap stalls on a full buffer;
+                    # map keeps the chunks, and so the devices, in address order
+                    with ThreadPoolExecutor(max_workers=len(procs)) as executor:
+                        chunks = executor.map(self._parse_output, [proc.stdout for proc in procs])
+                        devices = [device for chunk in chunks for device in chunk]
+                for proc in procs:
+                    proc.wait()
+            finally:
+                self._timeout_timer.cancel()
+                for proc in procs:
+                    if proc.poll() is None:
+                        proc.kill()
+                        proc.wait()
+                    proc.stdout.close()
+
+            if self._timed_out.is_set():
+                raise subprocess.TimeoutExpired(self._command(self.subnet), NMAP_TIMEOUT)
 
             print(f"[+] Found {len(devices)} devices")
             return devices
@@ -66,29 +187,98 @@ class NetworkScanner:
         except subprocess.TimeoutExpired:
             print("[!] Network scan timed out")
             return []
-        except FileNotFoundError:
-            print("[!] nmap not found. Install with: sudo apt install nmap")
-            return []
         except Exception as e:
-            print(f"[!] Error scanning network: {e}")
+            # A killed nmap leaves truncated XML behind
+            if self._timed_out.is_set():
+                print("[!] Network scan timed out")
+            else:
+                print(f"[!] Error scanning network: {e}")
             return []
 
+    def _targets(self) -> list[str]:
+        """Split the configured subnet into chunks that nmap can sweep in parallel"""
+        targets = []
+        for target in self.subnet.split():
+            try:
+                network = ipaddress.ip_network(target, strict=False)
+            except ValueError:
+                # Ranges and hostnames are left for nmap to expand
+                targets.append(target)
+                continue
+            # Each extra prefix bit doubles the chunks: bounded by max_parallel and chunk_size
+            split_bits = min(
+                self.max_parallel.bit_length() - 1,
+                (network.num_addresses // self.chunk_size).bit_length() - 1,
+            )
+            if split_bits > 0:
+                targets.extend(str(chunk) for chunk in network.subnets(prefixlen_diff=split_bits))
+            else:
+                targets.append(target)
+        return targets
+
+    @staticmethod
+    def _command(target: str) -> list[str]:
+        """nmap ping-sweep command for one target, with XML results on stdout"""
+        return ["nmap", "-sn", "-T4", "-oX", "-", target]
+
+    @staticmethod
+    def _parse_output(stream: IO[bytes]) -> list[dict]:
+        """Stream-parse nmap -oX output as it arrives, one device per host that is up"""
+        devices = []
+        root = None
+
+        for event, elem in ET.iterparse(stream, events=("start", "end")):
+            if root is None:
+                root = elem
+            if event != "end" or elem.tag != "host":
+                continue
+
+            status = elem.find("status")
+            if status is None or status.get("state") == "up":
+                device = {"ip": "", "hostname": ""}
+                for address in elem.iterfind("address"):
+                    if address.get("addrtype") == "mac":
+                        device["mac"] = address.get("addr")
+                        if address.get("vendor"):
+                            device["vendor"] = address.get("vendor")
+                    elif not device["ip"]:
+                        device["ip"] = address.get("addr")
+                hostname = elem.find("hostnames/hostname")
+                if hostname is not None:
+                    device["hostname"] = hostname.get("name", "")
+                devices.append(device)
+
+            # Drop finished hosts so memory stays flat across large sweeps
+            elem.clear()
+            root.clear()
+
+        return devices
+
 
 class UniFiAPI:
     """Handles UniFi Controller API interactions"""
 
     def __init__(
-        self, host: str, username: str, password: str, port: int = 8443, site: str = "default"
+        self,
+        host: str,
+        username: str,
+        password: str,
+        port: int = 8443,
+        site: str = "default",
+        session: requests.Session | None = None,
     ):
         self.base_url = f"https://{host}:{port}"
         self.username = username
         self.password = password
         self.site = site
-        self.session = requests.Session()
-        self.session.verify = False
+        self.session = session or create_session()
         self.logged_in = False
         self.is_unifi_os = False
         self.api_prefix = ""
+        # The session cookie is kept between scans; a 401 triggers one re-login
+        # shared by every request that saw it
+        self._login_lock = threading.Lock()
+        self._login_generation = 0
 
     def login(self) -> bool:
         """Login to UniFi Controller (auto-detects traditional vs UniFi OS)"""
@@ -130,108 +320,108 @@ class UniFiAPI:
             print(f"[!] Error connecting to UniFi: {e}")
             return False
 
-    def get_clients(self) -> list[dict]:
-        """Get all connected clients"""
-        if not self.logged_in:
-            return []
-
+    def _reauthenticate(self, stale_generation: int) -> bool:
+        """Log in again after a 401, unless a concurrent request already has"""
+        with self._login_lock:
+            if self._login_generation == stale_generation:
+                self.logged_in = False
+                if not self.login():
+                    return False
+                self._login_generation += 1
+            return self.logged_in
+
+    def _get(self, path: str, label: str) -> list[dict] | None:
+        """GET a site API path and return its data list, or None on failure"""
         try:
-            print("[*] Fetching UniFi clients...")
+            generation = self._login_generation
             response = self.session.get(
-                f"{self.base_url}{self.api_prefix}/api/s/{self.site}/stat/sta", timeout=10
+                f"{self.base_url}{self.api_prefix}/api/s/{self.site}/{path}", timeout=10
             )
+            # Expired session cookie: log in again and retry once
+            if response.status_code == 401 and self._reauthenticate(generation):
+                response = self.session.get(
+                    f"{self.base_url}{self.api_prefix}/api/s/{self.site}/{path}", timeout=10
+                )
 
             if response.status_code == 200:
-                data = response.json()
-                clients = data.get("data", [])
-                print(f"[+] Found {len(clients)} connected clients")
-                return clients
-            else:
-                print(f"[!] Failed to fetch clients: {response.status_code}")
-                return []
+                return orjson.loads(response.content).get("data", [])
+            print(f"[!] Failed to fetch {label}: {response.status_code}")
+            return None
 
         except Exception as e:
-            print(f"[!] Error fetching clients: {e}")
+            print(f"[!] Error fetching {label}: {e}")
+            return None
+
+    def get_clients(self) -> list[dict]:
+        """Get all connected clients"""
+        if not self.logged_in:
+            return []
+
+        print("[*] Fetching UniFi clients...")
+        clients = self._get("stat/sta", "clients")
+        if clients is None:
             return []
+        print(f"[+] Found {len(clients)} connected clients")
+        return clients
 
     def get_networks(self) -> list[dict]:
         """Get all configured networks"""
         if not self.logged_in:
             return []
 
-        try:
-            print("[*] Fetching UniFi networks...")
-            response = self.session.get(
-                f"{self.base_url}{self.api_prefix}/api/s/{self.site}/rest/networkconf", timeout=10
-            )
-
-            if response.status_code == 200:
-                data = response.json()
-                networks = data.get("data", [])
-                print(f"[+] Found {len(networks)} configured networks")
-                return networks
-            else:
-                print(f"[!] Failed to fetch networks: {response.status_code}")
-                return []
-
-        except Exception as e:
-            print(f"[!] Error fetching networks: {e}")
+        print("[*] Fetching UniFi networks...")
+        networks = self._get("rest/networkconf", "networks")
+        if networks is None:
             return []
+        print(f"[+] Found {len(networks)} configured networks")
+        return networks
 
     def get_access_points(self) -> list[dict]:
         """Get all access points"""
         if not self.logged_in:
             return []
 
-        try:
-            print("[*] Fetching UniFi access points...")
-            response = self.session.get(
-                f"{self.base_url}{self.api_prefix}/api/s/{self.site}/stat/device", timeout=10
-            )
-
-            if response.status_code == 200:
-                data = response.json()
-                devices = data.get("data", [])
-                aps = [d for d in devices if d.get("type") in ["uap", "udm", "uxg"]]
-                print(f"[+] Found {len(aps)} access points")
-                return aps
-            else:
-                print(f"[!] Failed to fetch APs: {response.status_code}")
-                return []
-
-        except Exception as e:
-            print(f"[!] Error fetching APs: {e}")
+        print("[*] Fetching UniFi access points...")
+        devices = self._get("stat/device", "APs")
+        if devices is None:
             return []
+        aps = [d for d in devices if d.get("type") in _AP_TYPES]
+        print(f"[+] Found {len(aps)} access points")
+        return aps
 
     def logout(self):
         """Logout from UniFi Controller"""
         if self.logged_in:
             try:
-                self.session.post(f"{self.base_url}/api/logout")
+                self.session.post(f"{self.base_url}/api/logout", timeout=10)
                 print("[+] Logged out from UniFi")
             except Exception:
                 pass
+            self.logged_in = False
 
 
 class PortainerAPI:
     """Handles Portainer API interactions"""
 
-    def __init__(self, name: str, url: str, api_token: str):
+    def __init__(
+        self, name: str, url: str, api_token: str, session: requests.Session | None = None
+    ):
         self.name = name
         self.url = url.rstrip("/")
         self.api_token = api_token
         self.headers = {"X-API-Key": api_token}
+        self.session = session or create_session()
 
     def get_endpoints(self) -> list[dict]:
         """Get all Docker endpoints"""
         try:
             print(f"[*] Fetching endpoints from {self.name}...")
-            response = requests.get(
-                f"{self.url}/api/endpoints", headers=self.headers, timeout=10, verify=False
+            response = self.session.get(
+                f"{self.url}/api/endpoints", headers=self.headers, timeout=10
             )
 
             if response.status_code == 200:
-                endpoints = response.json()
+                endpoints = orjson.loads(response.content)
                 print(f"[+] Found {len(endpoints)} endpoints")
                 return endpoints
             else:
@@ -245,15 +435,14 @@ class PortainerAPI:
     def get_containers(self, endpoint_id: int) -> list[dict]:
         """Get all containers for an endpoint"""
         try:
-            response = requests.get(
+            response = self.session.get(
                 f"{self.url}/api/endpoints/{endpoint_id}/docker/containers/json?all=1",
                 headers=self.headers,
                 timeout=10,
-                verify=False,
             )
 
             if response.status_code == 200:
-                containers = response.json()
+                containers = orjson.loads(response.content)
                 return containers
             else:
                 print(
@@ -269,19 +458,24 @@ class PortainerAPI:
         """Get all containers from all endpoints"""
         all_containers = []
         endpoints = self.get_endpoints()
+        if not endpoints:
+            print(f"[+] Found 0 total containers on {self.name}")
+            return all_containers
 
         for endpoint in endpoints:
-            endpoint_id = endpoint["Id"]
-            endpoint_name = endpoint["Name"]
-            print(f"[*] Fetching containers from endpoint: {endpoint_name}...")
+            print(f"[*] Fetching containers from endpoint: {endpoint['Name']}...")
 
-            containers = self.get_containers(endpoint_id)
+        # One request per endpoint, issued side by side; map keeps endpoint order in the results
+        with ThreadPoolExecutor(max_workers=min(ENDPOINT_FETCH_WORKERS, len(endpoints))) as executor:
+            results = list(executor.map(self.get_containers, [endpoint["Id"] for endpoint in endpoints]))
 
+        append = all_containers.append
+        for endpoint, containers in zip(endpoints, results):
+            # Tags are the same for every container on the endpoint, so build them once
+            meta = {"portainer_instance": self.name, "endpoint_name": endpoint["Name"], "endpoint_id": endpoint["Id"]}
             for container in containers:
-                container["portainer_instance"] = self.name
-                container["endpoint_name"] = endpoint_name
-                container["endpoint_id"] = endpoint_id
-                all_containers.append(container)
+                container.update(meta)
+                append(container)
 
         print(f"[+] Found {len(all_containers)} total containers on {self.name}")
         return all_containers
@@ -304,6 +498,8 @@ class ProxmoxAPI:
             from proxmoxer import ProxmoxAPI as ProxmoxerAPI
 
             print(f"[*] Connecting to {self.name} at {self.host}...")
+            if not self.verify_ssl:
+                _disable_ssl_warnings_once()
 
             # Parse token name: username@realm!tokenname
             user_realm, token_name = self.api_token_name.rsplit('!', 1)
@@ -337,74 +533,102 @@ class ProxmoxAPI:
             print(f"[!] Error fetching nodes from {self.name}: {e}")
             return []
 
+    def _get_qemu_config(self, node_name: str, vmid: int) -> dict | None:
+        """Fetch a QEMU VM's config, or None when it can't be read"""
+        try:
+            return self.proxmox.nodes(node_name).qemu(vmid).config.get()
+        except Exception:
+            return None
+
+    def _scan_node(self, node_name: str) -> list[dict]:
+        """Get the QEMU VMs and LXC containers on one cluster node"""
+        node_vms = []
+        print(f"[*] Fetching VMs from node: {node_name}...")
+
+        # Get QEMU VMs
+        try:
+            qemu_vms = self.proxmox.nodes(node_name).qemu.get()
+
+            # Per-VM config reads are independent GETs, so issue them side by side;
+            # proxmoxer keeps one pooled requests session per client
+            configs = []
+            if qemu_vms:
+                with ThreadPoolExecutor(max_workers=min(VM_CONFIG_WORKERS, len(qemu_vms))) as executor:
+                    configs = list(executor.map(
+                        lambda vm: self._get_qemu_config(node_name, vm["vmid"]), qemu_vms
+                    ))
+
+            for vm, config in zip(qemu_vms, configs):
+                vm_data = {
+                    "node": node_name,
+                    "vmid": vm.get("vmid"),
+                    "name": vm.get("name"),
+                    "status": vm.get("status"),
+                    "cpu": vm.get("cpus", 0),
+                    "memory": vm.get("maxmem", 0) // (1024 * 1024),  # Convert to MB
+                    "type": "qemu",
+                    "proxmox_instance": self.name
+                }
+
+                vm_data["ip_addresses"] = []
+                vm_data["mac_addresses"] = []
+
+                # Parse network interfaces from the VM config, when it could be read
+                for key, value in (config or {}).items():
+                    if key.startswith('net'):
+                        mac = _extract_mac(value)
+                        if mac:
+                            vm_data["mac_addresses"].append(mac)
+
+                node_vms.append(vm_data)
+
+        except Exception as e:
+            print(f"[!] Error fetching QEMU VMs from {node_name}: {e}")
+
+        # Get LXC containers
+        try:
+            lxc_containers = self.proxmox.nodes(node_name).lxc.get()
+            for container in lxc_containers:
+                container_data = {
+                    "node": node_name,
+                    "vmid": container.get("vmid"),
+                    "name": container.get("name"),
+                    "status": container.get("status"),
+                    "cpu": container.get("cpus", 0),
+                    "memory": container.get("maxmem", 0) // (1024 * 1024),  # Convert to MB
+                    "type": "lxc",
+                    "proxmox_instance": self.name,
+                    "ip_addresses": [],
+                    "mac_addresses": []
+                }
+                node_vms.append(container_data)
+
+        except Exception as e:
+            print(f"[!] Error fetching LXC containers from {node_name}: {e}")
+
+        return node_vms
+
     def get_vms(self) -> list[dict]:
         """Get all VMs (QEMU) and Containers (LXC) across all nodes"""
         all_vms = []
 
         try:
-            nodes = self.get_nodes()
-
-            for node in nodes:
-                node_name = node['node']
-                print(f"[*] Fetching VMs from node: {node_name}...")
-
-                # Get QEMU VMs
-                try:
-                    qemu_vms = self.proxmox.nodes(node_name).qemu.get()
-                    for vm in qemu_vms:
-                        vm_data = {
-                            "node": node_name,
-                            "vmid": vm.get("vmid"),
-                            "name": vm.get("name"),
-                            "status": vm.get("status"),
-                            "cpu": vm.get("cpus", 0),
-                            "memory": vm.get("maxmem", 0) // (1024 * 1024),  # Convert to MB
-                            "type": "qemu",
-                            "proxmox_instance": self.name
-                        }
-
-                        # Try to get network config for IP addresses
-                        try:
-                            config = self.proxmox.nodes(node_name).qemu(vm["vmid"]).config.get()
-                            vm_data["ip_addresses"] = []
-                            vm_data["mac_addresses"] = []
-
-                            # Parse network interfaces
-                            for key, value in config.items():
-                                if key.startswith('net'):
-                                    # Extract MAC address
-                                    mac_match = re.search(r'([0-9A-Fa-f]{2}[:-]){5}([0-9A-Fa-f]{2})', str(value))
-                                    if mac_match:
-                                        vm_data["mac_addresses"].append(mac_match.group(0))
-                        except Exception:
-                            vm_data["ip_addresses"] = []
-                            vm_data["mac_addresses"] = []
-
-                        all_vms.append(vm_data)
-
-                except Exception as e:
-                    print(f"[!] Error fetching QEMU VMs from {node_name}: {e}")
-
-                # Get LXC containers
-                try:
-                    lxc_containers = self.proxmox.nodes(node_name).lxc.get()
-                    for container in lxc_containers:
-                        container_data = {
-                            "node": node_name,
-                            "vmid": container.get("vmid"),
-                            "name": container.get("name"),
-                            "status": container.get("status"),
-                            "cpu": container.get("cpus", 0),
-                            "memory": container.get("maxmem", 0) // (1024 * 1024),  # Convert to MB
-                            "type": "lxc",
-                            "proxmox_instance": self.name,
-                            "ip_addresses": [],
-                            "mac_addresses": []
-                        }
-                        all_vms.append(container_data)
-
-                except Exception as e:
-                    print(f"[!] Error fetching LXC containers from {node_name}: {e}")
+            node_names = []
+            for node in self.get_nodes():
+                node_name = node.get('node')
+                if not node_name:
+                    continue
+                # Offline nodes only answer after the request timeout, so don't ask them
+                if node.get('status') != 'online':
+                    print(f"[*] Skipping {node.get('status', 'unknown')} node: {node_name}")
+                    continue
+                node_names.append(node_name)
+
+            # Cluster nodes are independent, so scan them side by side; map keeps node order
+            if node_names:
+                with ThreadPoolExecutor(max_workers=min(NODE_SCAN_WORKERS, len(node_names))) as executor:
+                    for node_vms in executor.map(self._scan_node, node_names):
+                        all_vms.extend(node_vms)
 
             print(f"[+] Found {len(all_vms)} total VMs/containers on {self.name}")
             return all_vms
@@ -417,61 +641,159 @@ class ProxmoxAPI:
 class NetworkInventory:
     """Main inventory class that coordinates all scanners"""
 
-    def __init__(self, config: dict):
+    def __init__(
+        self,
+        config: dict,
+        max_workers: int = 8,
+        sessions: dict[str, requests.Session] | None = None,
+    ):
         self.config = config
-
-    def scan_all(self):
-        """Perform complete inventory scan"""
+        self.max_workers = max_workers
+        # Pooled sessions keyed by remote target; pass a shared dict to keep
+        # TLS connections alive across inventory instances
+        self.sessions = sessions if sessions is not None else {}
+        # Connected Proxmox clients, reused by subsequent scans
+        self._proxmox_clients: dict[str, ProxmoxAPI] = {}
+        # Logged-in UniFi client, reused by subsequent scans until close()
+        self._unifi: UniFiAPI | None = None
+
+    def close(self):
+        """Log out of the UniFi session kept between scans"""
+        if self._unifi is not None:
+            self._unifi.logout()
+            self._unifi = None
+
+    def _get_session(self, key: str) -> requests.Session:
+        """Return the pooled session for a remote target, creating it on first use"""
+        with _SESSIONS_LOCK:
+            session = self.sessions.get(key)
+            if session is None:
+                session = self.sessions[key] = create_session()
+            return session
+
+    def scan_all(self, progress=None):
+        """Perform complete inventory scan
+
+        Every enabled source (nmap, UniFi, each Portainer and Proxmox instance)
+        is scanned concurrently, so total wall time is roughly that of the
+        slowest source rather than the sum of all of them.
+
+        Args:
+            progress: Optional callback called as progress(phase, completed, total)
+                each time a source finishes
+        """
         network_data = {"clients": [], "networks": [], "access_points": [], "scan_results": []}
         container_data = []
         vm_data = []
 
-        # Network scanning
-        if self.config.get("network_scan", {}).get("enabled", False):
-            subnet = self.config["network_scan"].get("subnet", "192.168.1.0/24")
-            scanner = NetworkScanner(subnet)
-            network_data["scan_results"] = scanner.scan_network()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            phases = {}
+
+            def submit(phase, fn, *args):
+                future = executor.submit(fn, *args)
+                phases[future] = phase
+                return future
+
+            network_future = None
+            unifi_future = None
+
+            # Network scanning: nmap is the long pole, so launch it before any
+            # API work and only park a worker on its output
+            if self.config.get("network_scan", {}).get("enabled", False):
+                scanner = self._network_scanner(self.config["network_scan"])
+                network_future = submit("network", scanner.collect, scanner.start())
+
+            # UniFi API
+            if self.config.get("unifi", {}).get("enabled", False):
+                unifi_future = submit("unifi", self._scan_unifi, self.config["unifi"])
+
+            # Portainer instances
+            portainer_futures = [
+                submit(f"portainer:{instance.get('name')}", self._scan_portainer, instance)
+                for instance in self.config.get("portainer") or []
+                if instance.get("enabled", True)
+            ]
+
+            # Proxmox instances
+            proxmox_futures = [
+                submit(f"proxmox:{instance.get('name')}", self._scan_proxmox, instance)
+                for instance in self.config.get("proxmox") or []
+                if instance.get("enabled", True)
+            ]
+
+            if progress:
+                for completed, future in enumerate(as_completed(phases), start=1):
+                    progress(phases[future], completed, len(phases))
+
+            # Collect in submission order so results stay deterministic
+            if network_future:
+                network_data["scan_results"] = network_future.result()
+            if unifi_future:
+                network_data.update(unifi_future.result())
+            for future in portainer_futures:
+                container_data.extend(future.result())
+            for future in proxmox_futures:
+                vm_data.extend(future.result())
+
+        return network_data, container_data, vm_data
 
-        # UniFi API
-        if self.config.get("unifi", {}).get("enabled", False):
-            unifi_config = self.config["unifi"]
-            unifi = UniFiAPI(
+    def _network_scanner(self, network_config: dict) -> NetworkScanner:
+        """nmap scanner for the configured subnet"""
+        return NetworkScanner(network_config.get("subnet", "192.168.1.0/24"))
+
+    def _scan_unifi(self, unifi_config: dict) -> dict:
+        """Fetch clients, networks and access points from UniFi"""
+        # Logging in is the slowest UniFi call, so the client stays logged in between scans
+        unifi = self._unifi
+        if unifi is None:
+            port = unifi_config.get("port", 8443)
+            unifi = self._unifi = UniFiAPI(
                 host=unifi_config["host"],
                 username=unifi_config["username"],
                 password=unifi_config["password"],
-                port=unifi_config.get("port", 8443),
+                port=port,
                 site=unifi_config.get("site", "default"),
+                session=self._get_session(f"unifi:{unifi_config['host']}:{port}"),
             )
 
-            if unifi.login():
-                network_data["clients"] = unifi.get_clients()
-                network_data["networks"] = unifi.get_networks()
-                network_data["access_points"] = unifi.get_access_points()
-                unifi.logout()
-
-        # Portainer instances
-        if self.config.get("portainer"):
-            for instance in self.config["portainer"]:
-                if instance.get("enabled", True):
-                    portainer = PortainerAPI(
-                        name=instance["name"], url=instance["url"], api_token=instance["api_token"]
-                    )
-                    containers = portainer.get_all_containers()
-                    container_data.extend(containers)
-
-        # Proxmox instances
-        if self.config.get("proxmox"):
-            for instance in self.config["proxmox"]:
-                if instance.get("enabled", True):
-                    proxmox = ProxmoxAPI(
-                        name=instance["name"],
-                        host=instance["host"],
-                        api_token_name=instance["api_token_name"],
-                        api_token_value=instance["api_token_value"],
-                        verify_ssl=instance.get("verify_ssl", False)
-                    )
-                    if proxmox.connect():
-                        vms = proxmox.get_vms()
-                        vm_data.extend(vms)
-
-        return network_data, container_data, vm_data
+        if not unifi.logged_in and not unifi.login():
+            return {}
+
+        # The three lists are independent, so fetch them side by side over the pooled session
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            clients = executor.submit(unifi.get_clients)
+            networks = executor.submit(unifi.get_networks)
+            access_points = executor.submit(unifi.get_access_points)
+            data = {
+                "clients": clients.result(),
+                "networks": networks.result(),
+                "access_points": access_points.result(),
+            }
+        return data
+
+    def _scan_portainer(self, instance: dict) -> list[dict]:
+        """Fetch all containers from a single Portainer instance"""
+        portainer = PortainerAPI(
+            name=instance["name"],
+            url=instance["url"],
+            api_token=instance["api_token"],
+            session=self._get_session(f"portainer:{instance['url']}"),
+        )
+        return portainer.get_all_containers()
+
+    def _scan_proxmox(self, instance: dict) -> list[dict]:
+        """Fetch all VMs and LXC containers from a single Proxmox instance"""
+        # proxmoxer keeps its own session, so reuse the connected client
+        proxmox = self._proxmox_clients.get(instance["name"])
+        if proxmox is None:
+            proxmox = ProxmoxAPI(
+                name=instance["name"],
+                host=instance["host"],
+                api_token_name=instance["api_token_name"],
+                api_token_value=instance["api_token_value"],
+                verify_ssl=instance.get("verify_ssl", False)
+            )
+            if not proxmox.connect():
+                return []
+            self._proxmox_clients[instance["name"]] = proxmox
+        return proxmox.get_vms()
@@ -1,7 +1,11 @@
 """WebSocket handler using Flask-SocketIO"""
 
 import logging
+import os
+import threading
+from dataclasses import asdict, dataclass
 
+import orjson
 from flask_socketio import SocketIO
 
 
@@ -10,12 +14,73 @@ logger = logging.getLogger(__name__)
 # Global socketio instance (initialized in app.py)
 socketio = None
 
+# Status updates arriving within this many seconds go out as a single emit
+STATUS_COALESCE_SECONDS = 0.1
 
-def init_socketio(app):
-    """Initialize SocketIO with Flask app"""
+# Latest status waiting to be emitted, and whether a flush is already scheduled
+_pending_status: dict | None = None
+_flusher_started = False
+_status_lock = threading.Lock()
+
+
+@dataclass(slots=True, frozen=True)
+class ScanSummary:
+    """Counts sent to clients when a scan completes, computed once per scan"""
+
+    timestamp: str | None
+    total_clients: int
+    total_containers: int
+    can_refresh: bool = False
+
+    @classmethod
+    def from_scan(cls, scan_data: dict) -> "ScanSummary":
+        """Summarize a finished scan's data"""
+        network = scan_data.get("network") or {}
+        return cls(
+            timestamp=scan_data.get("timestamp"),
+            total_clients=len(network.get("clients") or ()),
+            total_containers=len(scan_data.get("containers") or ()),
+            can_refresh=scan_data.get("can_refresh", False),
+        )
+
+
+# (summary, its dict form, orjson-encoded dict) for the last completed scan
+_last_summary_cache: tuple[ScanSummary, dict, bytes] | None = None
+
+
+class OrjsonJSON:
+    """json-module shim so socket.io packets are encoded with orjson
+
+    Flask-SocketIO otherwise uses flask.json, pushing an app context for every packet.
+    """
+
+    @staticmethod
+    def dumps(obj, **kwargs):
+        # orjson is always compact, which is what the packet encoder asks for via separators
+        return orjson.dumps(obj).decode()
+
+    @staticmethod
+    def loads(s, **kwargs):
+        return orjson.loads(s)
+
+
+def init_socketio(app, async_mode=None):
+    """
+    Initialize SocketIO with Flask app
+
+    Args:
+        app: Flask application
+        async_mode: Async backend; defaults to SOCKETIO_ASYNC_MODE or "threading"
+    """
     global socketio
     socketio = SocketIO(
-        app, cors_allowed_origins="*", async_mode="threading", logger=False, engineio_logger=False
+        app,
+        cors_allowed_origins="*",
+        async_mode=async_mode or os.getenv("SOCKETIO_ASYNC_MODE", "threading"),
+        logger=False,
+        engineio_logger=False,
+        json=OrjsonJSON,
+        ping_interval=25,  # Keep idle dashboard connections alive
     )
     logger.info("WebSocket support initialized")
     return socketio
@@ -28,18 +93,46 @@ def emit_scan_started():
         socketio.emit("scan_started", {"status": "scanning"})
 
 
-def emit_scan_completed(scan_data):
+def emit_scan_progress(phase, completed, total):
+    """Emit event when a scan source finishes"""
+    if socketio:
+        logger.debug(f"Emitting scan_progress event: {phase} ({completed}/{total})")
+        socketio.emit(
+            "scan_progress",
+            {
+                "phase": phase,
+                "completed": completed,
+                "total": total,
+                "pct": int(completed * 100 / total) if total else 100,
+            },
+        )
+
+
+def _encode_summary(summary: ScanSummary) -> tuple[dict, bytes]:
+    """Dict and JSON forms of a summary, built once per scan"""
+    global _last_summary_cache
+    cached = _last_summary_cache
+    if cached is not None and cached[0] == summary:
+        return cached[1], cached[2]
+    # Send summary instead of full data to reduce bandwidth
+    data = asdict(summary)
+    payload = orjson.dumps(data)
+    _last_summary_cache = (summary, data, payload)
+    return data, payload
+
+
+def last_summary_payload() -> bytes | None:
+    """Encoded summary of the last completed scan, or None before the first one"""
+    cached = _last_summary_cache
+    return cached[2] if cached is not None else None
+
+
+def emit_scan_completed(summary: ScanSummary):
     """Emit event when scan completes"""
+    data, _ = _encode_summary(summary)
     if socketio:
         logger.debug("Emitting scan_completed event")
-        # Send summary instead of full data to reduce bandwidth
-        summary = {
-            "timestamp": scan_data.get("timestamp"),
-            "total_clients": len(scan_data.get("network", {}).get("clients", [])),
-            "total_containers": len(scan_data.get("containers", [])),
-            "can_refresh": scan_data.get("can_refresh", False),
-        }
-        socketio.emit("scan_completed", summary)
+        socketio.emit("scan_completed", data)
 
 
 def emit_scan_failed(error_message):
@@ -50,7 +143,30 @@ def emit_scan_failed(error_message):
 
 
 def emit_status_update(status_data):
-    """Emit status update event"""
+    """Queue a status update event, coalescing bursts into one emit per window"""
+    global _pending_status, _flusher_started
     if socketio:
+        with _status_lock:
+            # Last write wins for each key
+            _pending_status = {**(_pending_status or {}), **status_data}
+            if _flusher_started:
+                return
+            _flusher_started = True
+        socketio.start_background_task(_flush_status_later)
+
+
+def _flush_status_later():
+    """Background task: wait out the coalescing window, then emit what accumulated"""
+    socketio.sleep(STATUS_COALESCE_SECONDS)
+    flush_status_updates()
+
+
+def flush_status_updates():
+    """Emit any pending status update now, e.g. on shutdown"""
+    global _pending_status, _flusher_started
+    with _status_lock:
+        status, _pending_status = _pending_status, None
+        _flusher_started = False
+    if status and socketio:
         logger.debug("Emitting status_update event")
-        socketio.emit("status_update", status_data)
+        socketio.emit("status_update", status)
@@ -0,0 +1,35 @@
+"""Shared pytest fixtures"""
+
+import os
+import tempfile
+from datetime import datetime
+
+import pytest
+
+
+# Importing app opens its database and log file; keep test runs out of the working tree
+_RUNTIME_DIR = tempfile.mkdtemp(prefix="network-inventory-tests-")
+os.environ.setdefault("DB_PATH", os.path.join(_RUNTIME_DIR, "inventory.db"))
+os.environ.setdefault("LOG_DIR", os.path.join(_RUNTIME_DIR, "logs"))
+
+
+@pytest.fixture
+def client():
+    """Create test client"""
+    # Imported here so modules that don't need the Flask app never load it
+    from app import app
+
+    app.config["TESTING"] = True
+    with app.test_client() as client:
+        yield client
+
+
+@pytest.fixture
+def mock_scan_data():
+    """Mock scan data"""
+    return {
+        "network": {"clients": [], "networks": [], "access_points": [], "scan_results": []},
+        "containers": [],
+        "timestamp": datetime.now().isoformat(),
+        "next_scan_available": datetime.now().isoformat(),
+    }
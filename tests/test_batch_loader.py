@@ -0,0 +1,51 @@
+"""Tests for request coalescing"""
+
+import pytest
+
+from batch_loader import BatchLoader
+
+
+class TestBatchLoader:
+    """Test BatchLoader coalescing"""
+
+    def test_concurrent_loads_share_one_batch(self):
+        """Loads within the window should be resolved by a single batch call"""
+        calls = []
+
+        def batch_fn(keys):
+            calls.append(sorted(keys))
+            return {key: key * 10 for key in keys}
+
+        loader = BatchLoader(batch_fn, window=0.05)
+        futures = [loader.load(key) for key in (1, 2, 3, 2)]
+
+        assert [f.result(timeout=1) for f in futures] == [10, 20, 30, 20]
+        assert calls == [[1, 2, 3]]
+
+    def test_missing_keys_resolve_to_none(self):
+        """Keys absent from the batch result should resolve to None"""
+        loader = BatchLoader(lambda keys: {}, window=0.001)
+        assert loader.load("missing").result(timeout=1) is None
+
+    def test_batch_errors_propagate(self):
+        """A failing batch should raise in every waiting caller"""
+
+        def batch_fn(keys):
+            raise RuntimeError("boom")
+
+        loader = BatchLoader(batch_fn, window=0.001)
+        with pytest.raises(RuntimeError):
+            loader.load(1).result(timeout=1)
+
+    def test_later_loads_start_new_batch(self):
+        """Loads after a dispatch should be batched separately"""
+        calls = []
+
+        def batch_fn(keys):
+            calls.append(keys)
+            return {key: key for key in keys}
+
+        loader = BatchLoader(batch_fn, window=0.001)
+        assert loader.load(1).result(timeout=1) == 1
+        assert loader.load(2).result(timeout=1) == 2
+        assert calls == [[1], [2]]
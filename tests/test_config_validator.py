@@ -0,0 +1,54 @@
+"""Tests for configuration validation"""
+
+import os
+from unittest.mock import patch
+
+import pytest
+from dotenv import load_dotenv
+from pydantic import ValidationError
+
+from config_validator import NetworkScanConfig, check_fatal_errors, validate_environment
+
+
+class TestNetworkScanConfig:
+    """Test subnet validation"""
+
+    def test_valid_subnet_accepted(self):
+        """A well-formed IPv4 CIDR range should pass"""
+        assert NetworkScanConfig(subnet="10.0.0.0/24").subnet == "10.0.0.0/24"
+
+    @pytest.mark.parametrize("subnet", ["256.1.1.1/24", "10.0.0.0/33", "10.0.0.0", "10.0.0/24"])
+    def test_invalid_subnet_rejected(self, subnet):
+        """Out-of-range octets or masks and malformed ranges should be rejected"""
+        with pytest.raises(ValidationError):
+            NetworkScanConfig(subnet=subnet)
+
+
+class TestValidateEnvironment:
+    """Test environment validation"""
+
+    def test_flags_from_dotenv_are_honored(self, tmp_path):
+        """Sources disabled only in .env should not be required to have credentials"""
+        env_file = tmp_path / ".env"
+        env_file.write_text("UNIFI_ENABLED=false\nPORTAINER_ENABLED=false\nNETWORK_SUBNET=10.0.0.0/24\n")
+
+        with patch.dict(os.environ, {}, clear=True):
+            load_dotenv(env_file)
+            warnings = validate_environment()
+
+        assert not check_fatal_errors(warnings)
+        assert warnings == ()
+
+    def test_result_is_cached_until_env_changes(self):
+        """Repeated calls should share one result, recomputed when a variable changes"""
+        env = {"UNIFI_ENABLED": "false", "PORTAINER_ENABLED": "false", "NETWORK_SCAN_ENABLED": "false"}
+        with patch.dict(os.environ, env, clear=True):
+            first = validate_environment()
+            assert isinstance(first, tuple)
+            assert validate_environment() is first
+            assert first == ("WARNING: All data sources are disabled. Enable at least one.",)
+
+            os.environ["UNIFI_ENABLED"] = "true"
+            warnings = validate_environment()
+            assert "ERROR: UNIFI_HOST is required when UniFi is enabled" in warnings
+            assert check_fatal_errors(warnings)
@@ -0,0 +1,261 @@
+"""Tests for the history database"""
+
+import json
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+
+from database import SCHEMA_VERSION, Database, from_epoch_us, pack_scan_data, to_epoch_us, unpack_scan_data
+
+
+@pytest.fixture
+def db(tmp_path):
+    """Create a database in a temporary directory"""
+    return Database(str(tmp_path / "inventory.db"))
+
+
+@pytest.fixture
+def scan_data():
+    """Sample scan data"""
+    return {
+        "network": {
+            "clients": [
+                {"mac": "aa", "is_wired": False, "rssi": -50},
+                {"mac": "bb", "is_wired": False, "rssi": -70},
+                {"mac": "cc", "is_wired": True},
+            ],
+            "networks": [{"name": "LAN"}],
+            "access_points": [],
+            "scan_results": [],
+        },
+        "containers": [
+            {"Names": ["/web"], "Status": "Up 2 hours (running)"},
+            {"Names": ["/db"], "Status": "Exited (0)"},
+        ],
+        "vms": [],
+        "timestamp": datetime.now().isoformat(),
+    }
+
+
+class TestTimestamps:
+    """Test timestamp storage"""
+
+    def test_stored_as_integer_micros(self, db, scan_data):
+        """Timestamps should be stored as integers and read back as ISO strings"""
+        db.save_scan(scan_data)
+        with db.get_connection() as conn:
+            row = conn.execute("SELECT typeof(timestamp) FROM scan_history").fetchone()
+        assert row[0] == "integer"
+        assert from_epoch_us(to_epoch_us(scan_data["timestamp"])) == scan_data["timestamp"]
+
+
+class TestConnection:
+    """Test connection setup"""
+
+    def test_wal_journal_mode(self, db):
+        """The database should use write-ahead logging"""
+        with db.get_connection() as conn:
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+            assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+
+    def test_schema_version_recorded(self, db):
+        """Initialized databases should record the schema version so reopening skips setup"""
+        with db.get_connection() as conn:
+            assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+
+    def test_relative_path_without_directory(self, tmp_path, monkeypatch):
+        """A bare filename should not require creating a directory"""
+        monkeypatch.chdir(tmp_path)
+        assert Database("inventory.db").get_setting("theme") == "light"
+
+    def test_connections_are_reused(self, db):
+        """Released connections should be handed out again instead of reopened"""
+        with db.get_connection() as first:
+            pass
+        with db.get_connection() as second:
+            assert second is first
+
+    def test_failed_transaction_rolls_back(self, db):
+        """Errors should roll back and leave the pooled connection usable"""
+        with pytest.raises(ZeroDivisionError):
+            with db.get_connection() as conn:
+                conn.execute("INSERT INTO settings (key, value) VALUES ('tmp', 'x')")
+                1 / 0
+        assert db.get_setting("tmp") is None
+
+    def test_metric_history_uses_covering_index(self, db):
+        """Single-metric history queries should be answered from the covering index"""
+        with db.get_connection() as conn:
+            plan = conn.execute(
+                "EXPLAIN QUERY PLAN SELECT timestamp, metric_value, metadata FROM metrics "
+                "WHERE metric_name = ? AND timestamp >= ? ORDER BY timestamp",
+                ("client_count", 0),
+            ).fetchall()
+        assert any("COVERING INDEX idx_metrics_name_timestamp" in row[3] for row in plan)
+
+
+class TestScanHistory:
+    """Test saving and reading scans"""
+
+    def test_save_and_get_scan(self, db, scan_data):
+        """Saved scans should be retrievable by ID"""
+        scan_id = db.save_scan(scan_data)
+        scan = db.get_scan_by_id(scan_id)
+        assert scan["data"] == scan_data
+        assert scan["timestamp"] == scan_data["timestamp"]
+        assert scan["summary"]["total_clients"] == 3
+
+    def test_recent_scans_refresh_after_save(self, db, scan_data):
+        """Memoized scan lists should be invalidated by new scans"""
+        assert db.get_recent_scans() == []
+        db.save_scan(scan_data)
+        scans = db.get_recent_scans()
+        assert len(scans) == 1
+        assert scans[0]["summary"]["total_containers"] == 2
+
+    def test_summary_columns_backfilled_on_old_database(self, tmp_path):
+        """Databases created before the summary columns should be migrated"""
+        path = tmp_path / "old.db"
+        conn = sqlite3.connect(path)
+        conn.execute(
+            """
+            CREATE TABLE scan_history (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp DATETIME NOT NULL,
+                scan_type TEXT NOT NULL,
+                data TEXT NOT NULL,
+                summary TEXT,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        """
+        )
+        summary = {"total_clients": 5, "total_containers": 2, "total_networks": 1, "total_aps": 0}
+        timestamp = datetime.now().isoformat()
+        conn.execute(
+            "INSERT INTO scan_history (timestamp, scan_type, data, summary) VALUES (?, 'full', '{}', ?)",
+            (timestamp, json.dumps(summary)),
+        )
+        conn.commit()
+        conn.close()
+
+        scans = Database(str(path)).get_recent_scans()
+        assert scans[0]["summary"] == summary
+        assert scans[0]["timestamp"] == timestamp
+
+    def test_scan_data_stored_compressed(self, db, scan_data):
+        """Scan payloads should be stored as compressed blobs"""
+        db.save_scan(scan_data)
+        with db.get_connection() as conn:
+            row = conn.execute("SELECT typeof(data), data FROM scan_history").fetchone()
+        assert row[0] == "blob"
+        assert unpack_scan_data(row[1]) == scan_data
+
+    def test_legacy_text_scan_data_readable(self, db, scan_data):
+        """Rows written before compression should still decode"""
+        assert unpack_scan_data(json.dumps(scan_data)) == scan_data
+        assert unpack_scan_data(pack_scan_data(scan_data)) == scan_data
+
+    def test_get_scans_by_ids(self, db, scan_data):
+        """Batched lookups should return only the scans that exist"""
+        first = db.save_scan(scan_data)
+        second = db.save_scan(scan_data)
+        scans = db.get_scans_by_ids([first, second, 9999])
+        assert set(scans) == {first, second}
+        assert scans[first]["data"] == scan_data
+
+    def test_scan_json_matches_decoded_scan(self, db, scan_data):
+        """Raw scan JSON should decode to the same result as get_scan_by_id"""
+        scan_id = db.save_scan(scan_data)
+        body = db.get_scans_json_by_ids([scan_id])[scan_id]
+        assert json.loads(body) == db.get_scan_by_id(scan_id)
+
+    def test_metric_history_batch_matches_single(self, db, scan_data):
+        """Batched metric history should match per-metric queries"""
+        db.save_scan(scan_data)
+        history = db.get_metric_history_batch(("client_count", "containers_running"))
+        assert history["client_count"] == db.get_metric_history("client_count")
+        assert history["containers_running"][0]["value"] == 1
+
+    def test_metrics_written_in_background(self, db, scan_data):
+        """Metric rows should be committed by the background writer after a flush"""
+        db.save_scan(scan_data)
+        db.flush()
+        with db.get_connection() as conn:
+            count = conn.execute("SELECT COUNT(*) FROM metrics").fetchone()[0]
+        assert count == 7
+
+    def test_saved_metrics_values(self, db, scan_data):
+        """Container and WiFi metrics should be derived from the scan"""
+        db.save_scan(scan_data)
+        history = db.get_metric_history_batch(("containers_stopped", "avg_wifi_signal"))
+        assert history["containers_stopped"][0]["value"] == 1
+        assert history["avg_wifi_signal"][0]["value"] == -60
+
+
+class TestRetention:
+    """Test time-range queries and cleanup"""
+
+    def test_metric_history_respects_time_range(self, db, scan_data):
+        """Metrics older than the requested window should be excluded"""
+        db.save_scan({**scan_data, "timestamp": (datetime.now() - timedelta(hours=30)).isoformat()})
+        db.save_scan(scan_data)
+        assert len(db.get_metric_history("client_count", hours=24)) == 1
+        assert len(db.get_metric_history("client_count", hours=48)) == 2
+
+    def test_long_ranges_read_hourly_rollup(self, db, scan_data):
+        """Ranges beyond the rollup threshold should return hourly aggregates"""
+        db.save_scan(scan_data)
+        fewer_clients = {**scan_data, "network": {**scan_data["network"], "clients": []}}
+        db.save_scan(fewer_clients)
+
+        points = db.get_metric_history("client_count", hours=72)
+        assert len(points) == 1
+        assert points[0]["value"] == 1.5
+        assert points[0]["metadata"] == {"min": 0, "max": 3, "count": 2}
+
+    def test_cleanup_removes_old_scans(self, db, scan_data):
+        """Cleanup should only delete rows older than the cutoff"""
+        db.save_scan({**scan_data, "timestamp": (datetime.now() - timedelta(days=40)).isoformat()})
+        db.save_scan(scan_data)
+        result = db.cleanup_old_data(days=30)
+        assert result["deleted_scans"] == 1
+        assert len(db.get_recent_scans()) == 1
+
+
+class TestSettings:
+    """Test user settings"""
+
+    def test_defaults_seeded(self, db):
+        """Default settings should exist on a fresh database"""
+        assert db.get_setting("theme") == "light"
+
+    def test_seed_keeps_user_values(self, db):
+        """Reopening a database should not reset customized settings"""
+        db.set_setting("theme", "dark")
+        reopened = Database(db.db_path)
+        assert reopened.get_setting("theme") == "dark"
+        assert reopened.get_setting("status_poll_interval") == "5000"
+
+    def test_update_settings_invalidates_cache(self, db):
+        """Cached settings should reflect updates"""
+        assert db.get_all_settings()["theme"] == "light"
+        db.update_settings({"theme": "dark"})
+        assert db.get_all_settings()["theme"] == "dark"
+
+    def test_get_setting_reflects_set_setting(self, db):
+        """Single setting reads should not return stale cached values"""
+        assert db.get_setting("theme") == "light"
+        db.set_setting("theme", "dark")
+        assert db.get_setting("theme") == "dark"
+        assert db.get_setting("missing", "fallback") == "fallback"
+
+    def test_diagram_template_lookup(self, db):
+        """Templates should be retrievable by name until deleted"""
+        db.save_diagram_template("compact", {"include_vms": False})
+        assert db.get_diagram_template("compact")["options"] == {"include_vms": False}
+        first_id = db.get_diagram_template("compact")["id"]
+        assert db.save_diagram_template("compact", {"include_vms": True}) == first_id
+        assert db.get_diagram_template("compact")["options"] == {"include_vms": True}
+        db.delete_diagram_template("compact")
+        assert db.get_diagram_template("compact") is None
@@ -0,0 +1,245 @@
+"""Tests for topology diagram generation"""
+
+import os
+import subprocess
+from unittest.mock import patch
+
+import pytest
+
+import diagram_generator
+from diagram_generator import GROUP_THRESHOLD, TopologyDiagramGenerator, build_container_nodes
+
+
+@pytest.fixture
+def scan_data():
+    """Sample scan data with networks, clients, containers and VMs"""
+    return {
+        "network": {
+            "networks": [
+                {"name": "Main LAN", "vlan": 1, "ip_subnet": "10.0.0.0/24"},
+                {"name": "IoT", "vlan": 20, "ip_subnet": "10.0.20.0/24"},
+            ],
+            "access_points": [{"name": "AP1", "model": "U6", "num_sta": 3}],
+            "clients": [
+                {"hostname": "laptop", "ip": "10.0.0.10", "is_wired": False, "rssi": -55},
+                {"hostname": "nas", "ip": "10.0.0.20", "is_wired": True},
+            ],
+        },
+        "containers": [
+            {"Names": ["/web"], "Image": "nginx", "State": "running", "portainer_instance": "Main", "endpoint_name": "local"},
+            {"Names": ["/db"], "Image": "postgres", "State": "exited", "portainer_instance": "Main", "endpoint_name": "local"},
+        ],
+        "vms": [{"name": "pihole", "node": "pve", "status": "running", "type": "lxc"}],
+    }
+
+
+def fake_dot(cmd, **kwargs):
+    """Stand-in for the dot binary: writes the -T flag to the -o output file"""
+    with open(cmd[4], "w") as f:
+        f.write(cmd[1])
+    return subprocess.CompletedProcess(cmd, 0)
+
+
+def build_source(scan_data, options=None):
+    """Build the DOT source without invoking the Graphviz binary"""
+    generator = TopologyDiagramGenerator(scan_data, options or {})
+    generator._create_graph()
+    generator._add_nodes()
+    generator._add_edges()
+    return generator.graph.source
+
+
+class TestNodes:
+    """Test node generation"""
+
+    def test_light_theme_styles(self, scan_data):
+        """Nodes should carry their type's shape and colors"""
+        source = build_source(scan_data)
+        assert "net_Main_LAN [label=" in source
+        assert 'shape=folder' in source
+        assert 'fillcolor="#e1f5fe"' in source
+
+    def test_dark_theme_keeps_shapes(self, scan_data):
+        """Dark theme overrides colors without dropping the base node shapes"""
+        source = build_source(scan_data, {"theme": "dark"})
+        assert 'fillcolor="#311b92"' in source
+        assert "shape=folder" in source
+        assert "shape=component" in source
+
+    def test_large_collections_are_grouped(self, scan_data):
+        """Collections over the threshold should collapse into a single group node"""
+        scan_data["vms"] = [{"name": f"vm{i}"} for i in range(GROUP_THRESHOLD + 1)]
+        source = build_source(scan_data)
+        assert "vm_group [label=" in source
+        assert "vm_0 " not in source
+
+    def test_grouping_reported_once(self, scan_data):
+        """Each grouped collection should be reported once, not again while adding edges"""
+        scan_data["vms"] = [{"name": f"vm{i}"} for i in range(GROUP_THRESHOLD + 1)]
+        generator = TopologyDiagramGenerator(scan_data, {})
+        generator._create_graph()
+        generator._add_nodes()
+        generator._add_edges()
+        assert generator.get_grouping_info() == [f"{GROUP_THRESHOLD + 1} VMs grouped for readability"]
+        assert "net_Main_LAN -> vm_group" in generator.graph.source
+
+    def test_overview_skips_container_and_vm_detail(self, scan_data):
+        """Overview draws endpoint hosts and a VM summary instead of individual nodes"""
+        source = build_source(scan_data, {"detail_level": "overview"})
+        assert "endpoint_Main_local [label=" in source
+        assert "container_Main_local_0" not in source
+        assert "vm_group [label=" in source
+        assert "vm_0 " not in source
+        assert "net_Main_LAN -> vm_group" in source
+
+    def test_huge_endpoint_summarized_on_host(self, scan_data):
+        """Endpoints past the summary threshold should draw only the host node with counts"""
+        scan_data["containers"] = [
+            {"Names": [f"/c{i}"], "State": "running", "portainer_instance": "Main", "endpoint_name": "local"}
+            for i in range(diagram_generator.SUMMARY_THRESHOLD + 1)
+        ]
+        generator = TopologyDiagramGenerator(scan_data, {})
+        generator._create_graph()
+        generator._add_nodes()
+        source = generator.graph.source
+        count = diagram_generator.SUMMARY_THRESHOLD + 1
+        assert f"{count}/{count} running" in source
+        assert "container_group_Main_local" not in source
+        assert "cluster_Main_local" not in source
+        assert generator.get_grouping_info() == [f"{count} local containers shown as counts on their host"]
+
+    def test_build_container_nodes(self):
+        """Container lines should carry a quoted ID, truncated image and status"""
+        containers = [{"Names": ["/app"], "Image": "registry.example.com/team/long-image:latest", "State": "running"}]
+        lines = build_container_nodes(containers, "Main_local", "shape=component")
+        assert lines == ['\tcontainer_Main_local_0 [label="🐳 app\\nregistry.example.com/team/l...\\nrunning" shape=component]\n']
+
+
+class TestEdges:
+    """Test edge generation"""
+
+    def test_hierarchy(self, scan_data):
+        """Internet, networks, endpoints and VMs should be connected top-down"""
+        source = build_source(scan_data)
+        assert "internet -> net_Main_LAN" in source
+        assert "net_Main_LAN -> ap_0" in source
+        assert "net_Main_LAN -> endpoint_Main_local" in source
+        assert "net_Main_LAN -> vm_0" in source
+
+    def test_containers_clustered_by_endpoint(self, scan_data):
+        """Containers should sit in their endpoint's cluster rather than hang off edges"""
+        source = build_source(scan_data)
+        cluster = source[source.index("subgraph cluster_Main_local {"):]
+        cluster = cluster[:cluster.index("\t}\n")]
+        assert "label=local" in cluster
+        assert "endpoint_Main_local [label=" in cluster
+        assert "container_Main_local_1 [label=" in cluster
+        assert "-> container_Main_local" not in source
+
+    def test_hosts_attach_to_matching_subnet(self, scan_data):
+        """VMs and endpoints with an IP in a known subnet should hang off that network"""
+        scan_data["vms"][0]["ip_addresses"] = ["10.0.20.5"]
+        scan_data["containers"][0]["NetworkSettings"] = {"Networks": {"iot_macvlan": {"IPAddress": "10.0.20.40"}}}
+        source = build_source(scan_data)
+        assert "net_IoT -> vm_0" in source
+        assert "net_IoT -> endpoint_Main_local" in source
+        assert "net_Main_LAN -> vm_0" not in source
+
+    def test_ids_needing_quotes(self, scan_data):
+        """Node IDs that aren't plain DOT identifiers should be quoted in nodes and edges"""
+        for container in scan_data["containers"]:
+            container["endpoint_name"] = "docker-01"
+        source = build_source(scan_data)
+        assert '"endpoint_Main_docker-01" [label=' in source
+        assert 'net_Main_LAN -> "endpoint_Main_docker-01"' in source
+
+    def test_endpoint_filter(self, scan_data):
+        """Excluded endpoints should have no nodes or edges"""
+        source = build_source(scan_data, {"included_endpoints": ["other"]})
+        assert "endpoint_Main_local" not in source
+
+
+class TestLayout:
+    """Test graph-level layout attributes"""
+
+    def test_small_graph_uses_orthogonal_edges(self, scan_data):
+        """Small topologies keep orthogonal routing"""
+        source = build_source(scan_data)
+        assert "splines=ortho" in source
+        assert "concentrate" not in source
+
+    def test_large_graph_uses_straight_edges(self, scan_data):
+        """Large topologies switch to straight, merged edges"""
+        scan_data["vms"] = [{"name": f"vm{i}"} for i in range(diagram_generator.LARGE_GRAPH_NODES + 1)]
+        source = build_source(scan_data)
+        assert "splines=line" in source
+        assert "concentrate=true" in source
+        assert "nodesep=0.3" in source
+
+
+class TestRenderCache:
+    """Test caching of rendered output"""
+
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        diagram_generator._render_cache.clear()
+        diagram_generator._source_cache.clear()
+        yield
+        diagram_generator._render_cache.clear()
+        diagram_generator._source_cache.clear()
+
+    @patch("diagram_generator.TopologyDiagramGenerator._render", return_value=b"<svg/>")
+    def test_unchanged_topology_renders_once(self, mock_render, scan_data):
+        """A rescan with the same topology should reuse the rendered diagram"""
+        first = TopologyDiagramGenerator({**scan_data, "timestamp": "t1"}, {}).generate("svg")
+        second = TopologyDiagramGenerator({**scan_data, "timestamp": "t2"}, {}).generate("svg")
+        assert first == second == b"<svg/>"
+        assert mock_render.call_count == 1
+
+    @patch("diagram_generator.TopologyDiagramGenerator._render", return_value=b"<svg/>")
+    def test_options_and_cache_bypass(self, mock_render, scan_data):
+        """Different options, or use_cache=False, should render again"""
+        TopologyDiagramGenerator(scan_data, {}).generate("svg")
+        TopologyDiagramGenerator(scan_data, {"theme": "dark"}).generate("svg")
+        TopologyDiagramGenerator(scan_data, {}).generate("svg", use_cache=False)
+        assert mock_render.call_count == 3
+
+    @patch("diagram_generator.subprocess.run", side_effect=fake_dot)
+    def test_format_switch_reuses_dot_source(self, mock_run, scan_data):
+        """Rendering another format should reuse the built DOT source"""
+        with patch.object(TopologyDiagramGenerator, "_add_nodes", autospec=True,
+                          side_effect=TopologyDiagramGenerator._add_nodes) as mock_add_nodes:
+            assert TopologyDiagramGenerator(scan_data, {}).generate("png") == b"-Tpng"
+            assert TopologyDiagramGenerator(scan_data, {}).generate("svg") == b"-Tsvg"
+
+        assert mock_add_nodes.call_count == 1
+        formats = [call.args[0][1] for call in mock_run.call_args_list]
+        assert formats == ["-Tpng", "-Tsvg"]
+
+    @patch("diagram_generator.subprocess.run", side_effect=fake_dot)
+    def test_render_uses_temporary_files(self, mock_run, scan_data):
+        """dot should read the source from a file and its output files should be cleaned up"""
+        sources = []
+
+        def record_source(cmd, **kwargs):
+            with open(cmd[2]) as f:
+                sources.append(f.read())
+            return fake_dot(cmd)
+
+        mock_run.side_effect = record_source
+        generator = TopologyDiagramGenerator(scan_data, {})
+        generator.generate("svg", use_cache=False)
+
+        cmd = mock_run.call_args.args[0]
+        assert sources == [generator._dot_source]
+        assert not os.path.exists(os.path.dirname(cmd[2]))
+
+    @patch("diagram_generator.subprocess.run", side_effect=fake_dot)
+    def test_generate_multi_renders_each_format(self, mock_run, scan_data):
+        """generate_multi should return every requested format and cache each one"""
+        generator = TopologyDiagramGenerator(scan_data, {})
+        assert generator.generate_multi(["png", "svg"]) == {"png": b"-Tpng", "svg": b"-Tsvg"}
+        assert mock_run.call_count == 2
+
+        assert TopologyDiagramGenerator(scan_data, {}).generate("svg") == b"-Tsvg"
+        assert mock_run.call_count == 2
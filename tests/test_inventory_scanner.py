@@ -1,13 +1,33 @@
 """Tests for inventory scanner modules"""
 
-import os
-import sys
+import io
+import threading
 from unittest.mock import MagicMock, patch
 
+import responses
+from responses import matchers
 
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from inventory_scanner import NetworkInventory, NetworkScanner, PortainerAPI, ProxmoxAPI, UniFiAPI
 
-from inventory_scanner import NetworkInventory, NetworkScanner, PortainerAPI, UniFiAPI
+
+def nmap_host(ip, hostname=None, mac=None, vendor=None, state="up"):
+    """One <host> element of nmap -oX output"""
+    xml = f'<host><status state="{state}"/><address addr="{ip}" addrtype="ipv4"/>'
+    if mac:
+        vendor_attr = f' vendor="{vendor}"' if vendor else ""
+        xml += f'<address addr="{mac}" addrtype="mac"{vendor_attr}/>'
+    xml += "<hostnames>"
+    if hostname:
+        xml += f'<hostname name="{hostname}" type="PTR"/>'
+    return xml + "</hostnames></host>"
+
+
+def nmap_stdout(*hosts):
+    """Pipe-like stdout carrying nmap -oX output for a mocked nmap process"""
+    return io.BytesIO(
+        ('<?xml version="1.0"?><nmaprun scanner="nmap" args="nmap -sn -oX -">'
+         + "".join(hosts) + "</nmaprun>").encode()
+    )
 
 
 class TestNetworkScanner:
@@ -18,24 +38,74 @@ class TestNetworkScanner:
         scanner = NetworkScanner("192.168.1.0/24")
         assert scanner.subnet == "192.168.1.0/24"
 
-    @patch("subprocess.run")
-    def test_scan_network_success(self, mock_run):
-        """Network scan should parse nmap output correctly"""
-        mock_run.return_value = MagicMock(
-            stdout="""
-            Nmap scan report for router (192.168.1.1)
-            MAC Address: AA:BB:CC:DD:EE:FF (Vendor Name)
-            """,
-            returncode=0,
+    @patch("subprocess.Popen")
+    def test_scan_network_success(self, mock_popen):
+        """A /24 should be swept as four /26 chunks and the devices merged in address order"""
+        chunk_output = {
+            "192.168.1.0/26": [nmap_host("192.168.1.1", "router", "AA:BB:CC:DD:EE:FF", "Vendor Name")],
+            "192.168.1.64/26": [],
+            "192.168.1.128/26": [nmap_host("192.168.1.130")],
+            "192.168.1.192/26": [nmap_host("192.168.1.254")],
+        }
+        mock_popen.side_effect = lambda cmd, **kwargs: MagicMock(
+            stdout=nmap_stdout(*chunk_output[cmd[-1]]), returncode=0
         )
         scanner = NetworkScanner("192.168.1.0/24")
         devices = scanner.scan_network()
-        assert isinstance(devices, list)
+        assert [call.args[0][-1] for call in mock_popen.call_args_list] == list(chunk_output)
+        assert [device["ip"] for device in devices] == ["192.168.1.1", "192.168.1.130", "192.168.1.254"]
+        assert devices[0]["vendor"] == "Vendor Name"
 
-    @patch("subprocess.run")
-    def test_scan_network_timeout(self, mock_run):
+    def test_targets_respect_parallel_and_chunk_limits(self):
+        """Subnets should split by max_parallel without going below chunk_size addresses"""
+        assert NetworkScanner("10.0.0.0/16", max_parallel=4)._targets() == [
+            "10.0.0.0/18", "10.0.64.0/18", "10.0.128.0/18", "10.0.192.0/18",
+        ]
+        assert NetworkScanner("192.168.1.0/25")._targets() == ["192.168.1.0/26", "192.168.1.64/26"]
+        assert NetworkScanner("192.168.1.0/27")._targets() == ["192.168.1.0/27"]
+        assert NetworkScanner("192.168.1.0/24", max_parallel=1)._targets() == ["192.168.1.0/24"]
+        assert NetworkScanner("192.168.1.1-50 host.lan")._targets() == ["192.168.1.1-50", "host.lan"]
+
+    @patch("subprocess.Popen")
+    def test_scan_network_parses_xml_hosts(self, mock_popen):
+        """Hosts with and without reverse DNS and MAC vendor should be parsed; down hosts skipped"""
+        mock_popen.return_value = MagicMock(
+            stdout=nmap_stdout(
+                nmap_host("192.168.1.1", "router", "AA:BB:CC:DD:EE:FF", "Vendor Name"),
+                nmap_host("192.168.1.20", state="down"),
+                nmap_host("192.168.1.50", mac="11:22:33:44:55:66"),
+            ),
+            returncode=0,
+        )
+        devices = NetworkScanner("192.168.1.0/24", max_parallel=1).scan_network()
+        assert mock_popen.call_args.args[0] == ["nmap", "-sn", "-T4", "-oX", "-", "192.168.1.0/24"]
+        assert devices == [
+            {"hostname": "router", "ip": "192.168.1.1", "mac": "AA:BB:CC:DD:EE:FF", "vendor": "Vendor Name"},
+            {"ip": "192.168.1.50", "hostname": "", "mac": "11:22:33:44:55:66"},
+        ]
+
+    @patch("inventory_scanner.NMAP_TIMEOUT", 0.05)
+    @patch("subprocess.Popen")
+    def test_scan_network_kills_overrunning_nmap(self, mock_popen):
+        """An nmap run past the timeout should be killed and reported as no devices"""
+        killed = threading.Event()
+
+        def blocking_read(size=-1):
+            killed.wait(5)
+            return b""
+
+        proc = mock_popen.return_value
+        proc.stdout = MagicMock(read=blocking_read)
+        proc.kill.side_effect = killed.set
+        proc.poll.return_value = -9
+
+        assert NetworkScanner("192.168.1.0/24").scan_network() == []
+        assert killed.is_set()
+
+    @patch("subprocess.Popen")
+    def test_scan_network_timeout(self, mock_popen):
         """Network scan should handle timeout gracefully"""
-        mock_run.side_effect = Exception("Timeout")
+        mock_popen.side_effect = Exception("Timeout")
         scanner = NetworkScanner("192.168.1.0/24")
         devices = scanner.scan_network()
         assert devices == []
@@ -52,34 +122,34 @@ class TestUniFiAPI:
         assert api.password == "pass"
         assert api.site == "default"
 
-    @patch("requests.Session.post")
-    def test_login_unifi_os(self, mock_post):
+    @responses.activate
+    def test_login_unifi_os(self):
         """Should detect UniFi OS login"""
-        mock_post.return_value = MagicMock(status_code=200)
+        responses.add(responses.POST, "https://host:8443/api/auth/login", status=200)
         api = UniFiAPI("host", "user", "pass")
         result = api.login()
         assert result is True
         assert api.is_unifi_os is True
         assert api.api_prefix == "/proxy/network"
 
-    @patch("requests.Session.post")
-    def test_login_traditional(self, mock_post):
+    @responses.activate
+    def test_login_traditional(self):
         """Should detect traditional controller login"""
-        mock_post.side_effect = [
-            MagicMock(status_code=404),  # UniFi OS fails
-            MagicMock(status_code=200),  # Traditional succeeds
-        ]
+        responses.add(responses.POST, "https://host:8443/api/auth/login", status=404)  # UniFi OS fails
+        responses.add(responses.POST, "https://host:8443/api/login", status=200)  # Traditional succeeds
         api = UniFiAPI("host", "user", "pass")
         result = api.login()
         assert result is True
         assert api.is_unifi_os is False
         assert api.api_prefix == ""
 
-    @patch("requests.Session.get")
-    def test_get_clients(self, mock_get):
+    @responses.activate
+    def test_get_clients(self):
         """Should fetch clients list"""
-        mock_get.return_value = MagicMock(
-            status_code=200, json=lambda: {"data": [{"mac": "AA:BB:CC:DD:EE:FF"}]}
+        responses.add(
+            responses.GET,
+            "https://host:8443/api/s/default/stat/sta",
+            json={"data": [{"mac": "AA:BB:CC:DD:EE:FF"}]},
         )
         api = UniFiAPI("host", "user", "pass")
         api.logged_in = True
@@ -87,10 +157,60 @@ class TestUniFiAPI:
         assert len(clients) == 1
         assert clients[0]["mac"] == "AA:BB:CC:DD:EE:FF"
 
+    @responses.activate
+    def test_expired_session_logs_in_again(self):
+        """A 401 should trigger one re-login and a retry of the request"""
+        expired = responses.add(responses.GET, "https://host:8443/api/s/default/stat/sta", status=401)
+        login = responses.add(responses.POST, "https://host:8443/api/auth/login", status=200)
+        # Logging in again detects UniFi OS, so the retry goes through the network proxy
+        retried = responses.add(
+            responses.GET,
+            "https://host:8443/proxy/network/api/s/default/stat/sta",
+            json={"data": [{"mac": "AA:BB:CC:DD:EE:FF"}]},
+        )
+        api = UniFiAPI("host", "user", "pass")
+        api.logged_in = True
+
+        assert len(api.get_clients()) == 1
+        assert (expired.call_count, login.call_count, retried.call_count) == (1, 1, 1)
+
+    @responses.activate
+    def test_get_access_points_filters_device_types(self):
+        """Only AP-capable devices should be returned, and failures give an empty list"""
+        url = "https://host:8443/api/s/default/stat/device"
+        responses.add(
+            responses.GET, url, json={"data": [{"type": "uap"}, {"type": "usw"}, {"type": "udm"}]}
+        )
+        api = UniFiAPI("host", "user", "pass")
+        api.logged_in = True
+        assert [d["type"] for d in api.get_access_points()] == ["uap", "udm"]
+
+        responses.upsert(responses.GET, url, status=500)
+        assert api.get_access_points() == []
+
 
 class TestPortainerAPI:
     """Test PortainerAPI class"""
 
+    def test_session_disables_ssl_warnings(self):
+        """Creating an unverified session should silence InsecureRequestWarning once"""
+        import inventory_scanner
+
+        with patch.object(inventory_scanner, "_SSL_WARNINGS_DISABLED", False), \
+                patch("urllib3.disable_warnings") as mock_disable:
+            inventory_scanner.create_session()
+            inventory_scanner.create_session()
+        mock_disable.assert_called_once()
+
+    def test_session_retries_dropped_connections(self):
+        """Shared sessions should mount a retrying, pooled adapter"""
+        api = PortainerAPI("Main", "https://host:9443", "token")
+        adapter = api.session.get_adapter("https://host:9443")
+        assert adapter.max_retries.total == 3
+        assert adapter.max_retries.connect == 1
+        assert adapter.max_retries.read == 1
+        assert api.session.get_adapter("http://host") is adapter
+
     def test_portainer_init(self):
         """Portainer API should initialize with credentials"""
         api = PortainerAPI("Main", "https://host:9443", "token123")
@@ -98,27 +218,93 @@ class TestPortainerAPI:
         assert api.url == "https://host:9443"
         assert api.api_token == "token123"
 
-    @patch("requests.get")
-    def test_get_endpoints(self, mock_get):
+    @responses.activate
+    def test_get_endpoints(self):
         """Should fetch endpoints"""
-        mock_get.return_value = MagicMock(
-            status_code=200, json=lambda: [{"Id": 1, "Name": "local"}]
+        responses.add(
+            responses.GET,
+            "https://host:9443/api/endpoints",
+            json=[{"Id": 1, "Name": "local"}],
+            match=[matchers.header_matcher({"X-API-Key": "token"})],
         )
         api = PortainerAPI("Main", "https://host:9443", "token")
         endpoints = api.get_endpoints()
         assert len(endpoints) == 1
         assert endpoints[0]["Name"] == "local"
 
-    @patch("requests.get")
-    def test_get_containers(self, mock_get):
+    @responses.activate
+    def test_get_containers(self):
         """Should fetch containers for endpoint"""
-        mock_get.return_value = MagicMock(
-            status_code=200, json=lambda: [{"Id": "abc123", "Names": ["/test"]}]
+        responses.add(
+            responses.GET,
+            "https://host:9443/api/endpoints/1/docker/containers/json?all=1",
+            json=[{"Id": "abc123", "Names": ["/test"]}],
         )
         api = PortainerAPI("Main", "https://host:9443", "token")
         containers = api.get_containers(1)
         assert len(containers) == 1
 
+    def test_get_all_containers_tags_in_endpoint_order(self):
+        """Containers fetched concurrently should be tagged and kept in endpoint order"""
+        api = PortainerAPI("Main", "https://host:9443", "token")
+        api.get_endpoints = MagicMock(return_value=[{"Id": 1, "Name": "local"}, {"Id": 2, "Name": "remote"}])
+        api.get_containers = MagicMock(side_effect=lambda endpoint_id: [{"Id": f"c{endpoint_id}"}])
+
+        containers = api.get_all_containers()
+        assert [(c["Id"], c["endpoint_name"], c["endpoint_id"]) for c in containers] == [
+            ("c1", "local", 1),
+            ("c2", "remote", 2),
+        ]
+        assert all(c["portainer_instance"] == "Main" for c in containers)
+
+
+class TestProxmoxAPI:
+    """Test ProxmoxAPI class"""
+
+    def test_get_vms_reads_configs_per_vm(self):
+        """QEMU configs fetched concurrently should map back to their VMs; failed reads give no MACs"""
+        api = ProxmoxAPI("pve", "host", "root@pam!token", "secret")
+        node = MagicMock()
+        node.qemu.get.return_value = [{"vmid": 100, "name": "web"}, {"vmid": 101, "name": "db"}]
+        node.lxc.get.return_value = []
+
+        def qemu(vmid):
+            config = MagicMock()
+            if vmid == 100:
+                config.config.get.return_value = {"net0": "virtio=AA:BB:CC:DD:EE:FF,bridge=vmbr0", "cores": 2}
+            else:
+                config.config.get.side_effect = Exception("forbidden")
+            return config
+
+        node.qemu.side_effect = qemu
+        api.proxmox = MagicMock()
+        api.proxmox.nodes.get.return_value = [{"node": "pve1", "status": "online"}]
+        api.proxmox.nodes.return_value = node
+
+        vms = api.get_vms()
+        assert [(vm["name"], vm["mac_addresses"]) for vm in vms] == [("web", ["AA:BB:CC:DD:EE:FF"]), ("db", [])]
+
+    def test_extract_mac_formats(self):
+        """MACs should be found after the model key, with a regex fallback for other layouts"""
+        from inventory_scanner import _extract_mac
+
+        assert _extract_mac("virtio=AA:BB:CC:DD:EE:FF,bridge=vmbr0,firewall=1") == "AA:BB:CC:DD:EE:FF"
+        assert _extract_mac("bridge=vmbr0,macaddr=11-22-33-44-55-66") == "11-22-33-44-55-66"
+        assert _extract_mac("virtio,bridge=vmbr0") is None
+
+    def test_get_vms_keeps_node_order(self):
+        """Online nodes scanned concurrently should be collected in cluster order, offline ones skipped"""
+        api = ProxmoxAPI("pve", "host", "root@pam!token", "secret")
+        api.proxmox = MagicMock()
+        api.proxmox.nodes.get.return_value = [
+            {"node": "pve1", "status": "online"},
+            {"node": "pve2", "status": "offline"},
+            {"node": "pve3", "status": "online"},
+        ]
+        api._scan_node = MagicMock(side_effect=lambda node_name: [{"node": node_name}])
+
+        assert [vm["node"] for vm in api.get_vms()] == ["pve1", "pve3"]
+
 
 class TestNetworkInventory:
     """Test NetworkInventory orchestrator"""
@@ -134,14 +320,32 @@ class TestNetworkInventory:
         """Should skip network scan when disabled"""
         config = {"network_scan": {"enabled": False}}
         inventory = NetworkInventory(config)
-        network_data, container_data = inventory.scan_all()
+        network_data, container_data, vm_data = inventory.scan_all()
         mock_scan.assert_not_called()
         assert network_data["scan_results"] == []
 
+    @patch("inventory_scanner.NetworkScanner.collect", return_value=[{"ip": "10.0.0.1"}])
+    @patch("inventory_scanner.NetworkScanner.start")
+    @patch("inventory_scanner.PortainerAPI")
+    def test_scan_all_starts_nmap_before_api_scans(self, mock_portainer, mock_start, mock_collect):
+        """nmap should be launched before the API scans and collected with them"""
+        order = []
+        mock_start.side_effect = lambda: order.append("nmap") or "proc"
+        mock_portainer.return_value.get_all_containers.side_effect = lambda: order.append("portainer") or []
+        config = {
+            "network_scan": {"enabled": True, "subnet": "10.0.0.0/24"},
+            "portainer": [{"name": "main", "url": "https://a", "api_token": "t"}],
+        }
+
+        network_data, _, _ = NetworkInventory(config).scan_all()
+        assert order == ["nmap", "portainer"]
+        mock_collect.assert_called_once_with("proc")
+        assert network_data["scan_results"] == [{"ip": "10.0.0.1"}]
+
     @patch("inventory_scanner.UniFiAPI")
     def test_scan_all_unifi_enabled(self, mock_unifi):
         """Should scan UniFi when enabled"""
-        mock_instance = MagicMock()
+        mock_instance = MagicMock(logged_in=False)
         mock_instance.login.return_value = True
         mock_instance.get_clients.return_value = []
         mock_instance.get_networks.return_value = []
@@ -153,6 +357,105 @@ class TestNetworkInventory:
             "unifi": {"enabled": True, "host": "host", "username": "user", "password": "pass"},
         }
         inventory = NetworkInventory(config)
-        network_data, _ = inventory.scan_all()
+        network_data, _, _ = inventory.scan_all()
         mock_instance.login.assert_called_once()
         mock_instance.get_clients.assert_called_once()
+        mock_instance.get_networks.assert_called_once()
+        mock_instance.get_access_points.assert_called_once()
+
+    @patch("inventory_scanner.UniFiAPI")
+    def test_scan_unifi_fetches_lists_concurrently(self, mock_unifi):
+        """The three UniFi lists should be in flight at the same time after login"""
+        barrier = threading.Barrier(3, timeout=5)
+
+        def fetch(result):
+            def getter():
+                barrier.wait()  # Only passes once all three getters are running
+                return result
+            return getter
+
+        mock_instance = MagicMock(logged_in=True)
+        mock_instance.get_clients.side_effect = fetch([{"mac": "aa"}])
+        mock_instance.get_networks.side_effect = fetch([{"name": "LAN"}])
+        mock_instance.get_access_points.side_effect = fetch([{"name": "AP"}])
+        mock_unifi.return_value = mock_instance
+
+        inventory = NetworkInventory({})
+        data = inventory._scan_unifi({"host": "host", "username": "user", "password": "pass"})
+        assert data == {
+            "clients": [{"mac": "aa"}],
+            "networks": [{"name": "LAN"}],
+            "access_points": [{"name": "AP"}],
+        }
+        mock_instance.login.assert_not_called()
+
+    @patch("inventory_scanner.UniFiAPI")
+    def test_scan_all_keeps_unifi_logged_in(self, mock_unifi):
+        """Later scans should reuse the UniFi login, and close() should log out"""
+        mock_instance = mock_unifi.return_value
+        mock_instance.logged_in = False
+
+        def login():
+            mock_instance.logged_in = True
+            return True
+
+        mock_instance.login.side_effect = login
+        config = {"unifi": {"enabled": True, "host": "host", "username": "user", "password": "pass"}}
+        inventory = NetworkInventory(config)
+        inventory.scan_all()
+        inventory.scan_all()
+
+        mock_unifi.assert_called_once()
+        mock_instance.login.assert_called_once()
+        mock_instance.logout.assert_not_called()
+        inventory.close()
+        mock_instance.logout.assert_called_once()
+
+    @patch("inventory_scanner.PortainerAPI")
+    def test_scan_all_keeps_instance_order(self, mock_portainer):
+        """Concurrent instance scans should be collected in config order"""
+        mock_portainer.side_effect = lambda name, **kwargs: MagicMock(
+            get_all_containers=MagicMock(return_value=[{"portainer_instance": name}])
+        )
+
+        config = {
+            "portainer": [
+                {"name": "first", "url": "https://a", "api_token": "t"},
+                {"name": "second", "url": "https://b", "api_token": "t"},
+                {"name": "skipped", "enabled": False, "url": "https://c", "api_token": "t"},
+            ],
+        }
+        inventory = NetworkInventory(config)
+        _, container_data, _ = inventory.scan_all()
+        assert [c["portainer_instance"] for c in container_data] == ["first", "second"]
+
+    @patch("inventory_scanner.PortainerAPI")
+    def test_scan_all_reuses_sessions(self, mock_portainer):
+        """Sessions should be shared across inventories for the same target"""
+        mock_portainer.return_value.get_all_containers.return_value = []
+        sessions = {}
+        config = {"portainer": [{"name": "main", "url": "https://a", "api_token": "t"}]}
+
+        NetworkInventory(config, sessions=sessions).scan_all()
+        NetworkInventory(config, sessions=sessions).scan_all()
+
+        first, second = (call.kwargs["session"] for call in mock_portainer.call_args_list)
+        assert first is second
+        assert list(sessions) == ["portainer:https://a"]
+
+    @patch("inventory_scanner.PortainerAPI")
+    def test_scan_all_reports_progress(self, mock_portainer):
+        """Progress callback should fire once per finished source"""
+        mock_portainer.return_value.get_all_containers.return_value = []
+        config = {
+            "portainer": [
+                {"name": "a", "url": "https://a", "api_token": "t"},
+                {"name": "b", "url": "https://b", "api_token": "t"},
+            ],
+        }
+        progress = MagicMock()
+        NetworkInventory(config).scan_all(progress=progress)
+
+        assert progress.call_count == 2
+        assert {call.args[0] for call in progress.call_args_list} == {"portainer:a", "portainer:b"}
+        assert progress.call_args_list[-1].args[1:] == (2, 2)
@@ -0,0 +1,66 @@
+"""Tests for WebSocket event emitters"""
+
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import socketio_handler
+
+
+@patch.object(socketio_handler, "_flusher_started", False)
+@patch.object(socketio_handler, "_pending_status", None)
+class TestStatusCoalescing:
+    """Test status_update coalescing"""
+
+    def test_burst_of_updates_is_emitted_once(self):
+        """Updates within the window should merge into a single emit, last write winning"""
+        flushed = threading.Event()
+        socketio = MagicMock()
+        socketio.sleep.side_effect = time.sleep
+
+        def start_background_task(target):
+            def run():
+                target()
+                flushed.set()
+            threading.Thread(target=run).start()
+
+        socketio.start_background_task.side_effect = start_background_task
+
+        with patch.object(socketio_handler, "socketio", socketio):
+            socketio_handler.emit_status_update({"is_scanning": True, "can_scan": False})
+            socketio_handler.emit_status_update({"is_scanning": False})
+            assert flushed.wait(5)
+
+        socketio.start_background_task.assert_called_once()
+        socketio.emit.assert_called_once_with(
+            "status_update", {"is_scanning": False, "can_scan": False}
+        )
+
+    def test_flush_emits_pending_update_immediately(self):
+        """flush_status_updates should send what is pending without waiting for the window"""
+        socketio = MagicMock()
+        with patch.object(socketio_handler, "socketio", socketio):
+            socketio_handler.emit_status_update({"is_scanning": False})
+            socketio_handler.flush_status_updates()
+            socketio_handler.flush_status_updates()
+
+        socketio.emit.assert_called_once_with("status_update", {"is_scanning": False})
+
+
+class TestOrjsonPackets:
+    """Test socket.io packet encoding"""
+
+    def test_packets_are_encoded_with_orjson(self):
+        """init_socketio should install the orjson shim on the socket.io packet encoder"""
+        from flask import Flask
+        from socketio import packet
+
+        original = packet.Packet.json
+        try:
+            with patch.object(socketio_handler, "socketio", None):
+                socketio_handler.init_socketio(Flask(__name__), async_mode="threading")
+            assert packet.Packet.json is socketio_handler.OrjsonJSON
+            encoded = packet.Packet(packet.EVENT, data=["status_update", {"pct": 50}]).encode()
+            assert encoded == '2["status_update",{"pct":50}]'
+        finally:
+            packet.Packet.json = original
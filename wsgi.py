@@ -0,0 +1,17 @@
+"""WSGI entry point for running under gunicorn
+
+    gunicorn -k geventwebsocket.gunicorn.workers.GeventWebSocketWorker -w 1 wsgi:application
+"""
+
+import os
+
+
+# The gevent worker monkey-patches the stdlib, so socket.io must use the matching backend
+os.environ.setdefault("SOCKETIO_ASYNC_MODE", "gevent")
+
+from app import app, validate_startup  # noqa: E402
+
+
+validate_startup()
+
+application = app